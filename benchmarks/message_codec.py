@@ -0,0 +1,63 @@
+"""Micro-benchmark for encoding and decoding client-server messages.
+
+Compares types.message_from_json and types.message_to_json, which use the
+message registry and the codecs compiled by json_codec, with the
+reflection-based DataClassJsonMixin.from_json and to_json.
+"""
+import argparse
+import timeit
+
+from fixie_sdk.voice import json_codec
+from fixie_sdk.voice import types
+
+MESSAGES = [
+    types.OutputDeltaMessage(delta="Hello, how can I help you today?"),
+    types.TranscriptMessage(
+        transcript=types.Transcript(
+            text="I'd like to order a pizza", final=False, stream_timestamp=1200
+        )
+    ),
+    types.PongMessage(timestamp=12345.678),
+    types.StateMessage(state=types.SessionState.LISTENING),
+    types.LatencyMessage(kind=types.SessionMetric.ASR, value=120),
+    types.InitMessage(
+        params=types.InitParameters(
+            tts=types.TTSParameters(provider="eleven-ws", voice="voice"),
+            agent=types.AgentParameters(agent_id="agent"),
+        )
+    ),
+]
+
+
+def _report(name: str, number: int, fast: float, slow: float):
+    print(
+        f"{name:<24} "
+        f"{number / fast:>8.0f} m/s "
+        f"{number / slow:>8.0f} m/s "
+        f"{slow / fast:>7.1f}x"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--number", "-n", type=int, default=20000, help="Iterations per message type"
+    )
+    args = parser.parse_args()
+
+    backend = "orjson" if json_codec.orjson_imported else "json"
+    print(f"JSON backend: {backend}")
+    print(f"{'message':<24} {'compiled':>12} {'mixin':>12} {'speedup':>8}")
+    for message in MESSAGES:
+        data = message.to_json()
+        clazz = type(message)
+        fast = timeit.timeit(lambda: types.message_from_json(data), number=args.number)
+        slow = timeit.timeit(lambda: clazz.from_json(data), number=args.number)
+        _report(f"{message.type} decode", args.number, fast, slow)
+        fast = timeit.timeit(lambda: types.message_to_json(message), number=args.number)
+        slow = timeit.timeit(lambda: message.to_json(), number=args.number)
+        _report(f"{message.type} encode", args.number, fast, slow)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,5 @@
 import argparse
 import asyncio
-import audioop
 import base64
 import json
 import logging
@@ -8,16 +7,18 @@ import time
 from typing import AsyncGenerator
 
 import aiohttp.web
-import numpy
-import soxr
-from pyee import asyncio as pyee_asyncio
 
 from fixie_sdk.voice import audio_base
+from fixie_sdk.voice import audio_channel
+from fixie_sdk.voice import audio_g711
+from fixie_sdk.voice import audio_queue
+from fixie_sdk.voice import audio_resample
 from fixie_sdk.voice.session import VoiceSession
 from fixie_sdk.voice.session import VoiceSessionParams
 
-# Maximum amount of audio data we will queue; we'll drop any additional data.
-MAX_QUEUE_SIZE = 10  # 100 ms
+# Maximum amount of audio we will queue from the caller; beyond this we drop
+# the oldest audio to keep latency down.
+MAX_QUEUE_MS = 100
 
 # Make sure our logger is configured to show info messages.
 logging.basicConfig(
@@ -28,48 +29,23 @@ logging.basicConfig(
 logging.getLogger("livekit").disabled = True
 
 
-class PhoneAudioSink(audio_base.AudioSink, pyee_asyncio.AsyncIOEventEmitter):
-    """AudioSink that queues up audio for the phone stream."""
-
-    def __init__(self) -> None:
-        super().__init__()
-
-    async def start(self, sample_rate: int, num_channels: int):
-        self._sample_rate = sample_rate
-
-    async def write(self, chunk: bytes) -> None:
-        self._started = True
-        sample = numpy.frombuffer(chunk, numpy.int16)
-        resampled = soxr.resample(sample, self._sample_rate, 8000).astype(numpy.int16)
-        ulaw = audioop.lin2ulaw(resampled.tobytes(), 2)
-        self.emit("data", ulaw)
-
-    async def close(self) -> None:
-        pass
-
-
 class PhoneAudioSource(audio_base.AudioSource):
     """AudioSource that reads from the phone stream."""
 
     def __init__(self, sample_rate: int = 8000, channels: int = 1):
         super().__init__(sample_rate, channels)
-        self._queue: asyncio.Queue[bytes] = asyncio.Queue(MAX_QUEUE_SIZE)
+        self._queue = audio_queue.AudioQueue(sample_rate, channels, MAX_QUEUE_MS)
         self._started = False
 
     def write(self, chunk: bytes) -> None:
         if not self._started:
             return
-        decoded = audioop.ulaw2lin(chunk, 2)
-        try:
-            self._queue.put_nowait(decoded)
-        except asyncio.QueueFull:
-            logging.warning("Dropping audio data; queue is full")
+        self._queue.put_nowait(audio_base.byte_view(audio_g711.decode(chunk)))
 
-    async def stream(self) -> AsyncGenerator[bytes, None]:
+    async def stream(self) -> AsyncGenerator[audio_base.AudioData, None]:
         self._started = True
-        while True:
-            buf = await self._queue.get()
-            yield buf if self.enabled else b"\x00" * len(buf)
+        async for buf in self._queue:
+            yield buf if self.enabled else audio_base.silence(len(buf))
 
 
 async def testhandle(request):
@@ -82,7 +58,9 @@ async def websocket_handler(request):
     await ws.prepare(request)
 
     source = PhoneAudioSource()
-    sink = PhoneAudioSink()
+    phone_sink = audio_channel.ChannelAudioSink()
+    # Convert the agent's 48 kHz audio to 8 kHz with one resampler for the whole call.
+    sink = audio_resample.ResamplingAudioSink(phone_sink, 8000)
     params = VoiceSessionParams(
         agent_id=args.agent, tts_voice=args.tts_voice, webrtc_url=args.webrtc_url
     )
@@ -91,29 +69,38 @@ async def websocket_handler(request):
     next_packet_number = 1
     packet_send_times = {}
 
-    @sink.on("data")
-    async def on_sink_data(data):
+    async def send_sink_audio():
+        # Send the agent's audio to Twilio in order, one chunk at a time.
         nonlocal next_packet_number
-        assert stream_sid
-        media_data = {
-            "event": "media",
-            "streamSid": stream_sid,
-            "media": {"payload": base64.b64encode(data).decode()},
-        }
-        await ws.send_json(media_data)
-
-        # Mark every 100th packet so we can measure RTT.
-        packet_number = next_packet_number
-        packet_number_str = str(packet_number)
-        next_packet_number += 1
-        if packet_number % 100 == 1:
-            packet_send_times[packet_number_str] = time.perf_counter()
-            mark_data = {
-                "event": "mark",
+        async for chunk in phone_sink.channel:
+            assert stream_sid
+            ulaw = audio_g711.encode(chunk).tobytes()
+            media_data = {
+                "event": "media",
                 "streamSid": stream_sid,
-                "mark": {"name": packet_number_str},
+                "media": {"payload": base64.b64encode(ulaw).decode()},
             }
-            await ws.send_json(mark_data)
+            await ws.send_json(media_data)
+
+            # Mark every 100th packet so we can measure RTT.
+            packet_number = next_packet_number
+            packet_number_str = str(packet_number)
+            next_packet_number += 1
+            if packet_number % 100 == 1:
+                packet_send_times[packet_number_str] = time.perf_counter()
+                mark_data = {
+                    "event": "mark",
+                    "streamSid": stream_sid,
+                    "mark": {"name": packet_number_str},
+                }
+                await ws.send_json(mark_data)
+
+    send_task = asyncio.create_task(send_sink_audio())
+
+    @phone_sink.on("clear")
+    async def on_sink_clear():
+        # Tell Twilio to drop the audio it has buffered for playback.
+        await ws.send_json({"event": "clear", "streamSid": stream_sid})
 
     # Set up the event handlers for the voice session.
     @session.on("state")
@@ -132,6 +119,10 @@ async def websocket_handler(request):
     async def on_latency(metric, value):
         logging.info(f"Latency: {metric.value}={value}")
 
+    @session.on("barge_in")
+    async def on_barge_in(reaction_ms):
+        logging.info(f"Barge-in, reacted in {reaction_ms:.0f} ms")
+
     @session.on("error")
     async def on_error(error):
         logging.error(f"Error: {error}")
@@ -179,6 +170,7 @@ async def websocket_handler(request):
 
     logging.info("Websocket connection closed")
     await session.stop()
+    send_task.cancel()
     return ws
 
 
@@ -18,6 +18,7 @@ async def main():
     params = VoiceSessionParams(
         agent_id=args.agent,
         tts_voice=args.tts_voice,
+        output_deltas=True,
     )
 
     # Create the client for the voice session.
@@ -34,15 +35,19 @@ async def main():
         if state == types.SessionState.LISTENING:
             print("User:  ", end="\r")
         elif state == types.SessionState.THINKING:
-            print("Agent:  ", end="\r")
+            print("Agent: ", end="", flush=True)
 
     @client.on("input")
     async def on_input(text, final):
         print("User:  " + text, end="\n" if final else "\r")
 
+    @client.on("output_delta")
+    async def on_output_delta(delta, offset):
+        print(delta, end="", flush=True)
+
     @client.on("output")
     async def on_output(text, final):
-        print("Agent: " + text, end="\n" if final else "\r")
+        print("\rAgent: " + text)
 
     @client.on("latency")
     async def on_latency(metric, value):
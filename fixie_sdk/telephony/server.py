@@ -0,0 +1,239 @@
+"""aiohttp server that bridges Twilio Media Streams calls to voice sessions.
+
+Twilio connects to `config.path` over a websocket for each call. The server
+limits the number of concurrent calls, caps the duration, idle time and
+message size of each call, and on shutdown stops accepting calls and lets
+the active ones finish (up to `config.drain_timeout`) before hanging up.
+"""
+import asyncio
+import dataclasses
+import logging
+import time
+from typing import Optional
+
+import aiohttp
+from aiohttp import web
+
+from fixie_sdk.telephony import twilio
+from fixie_sdk.voice import audio_channel
+from fixie_sdk.voice import audio_resample
+from fixie_sdk.voice.session import VoiceSession
+from fixie_sdk.voice.session import VoiceSessionParams
+from fixie_sdk.voice.session_pool import SessionFactory
+
+# We send a mark after this many media messages, to measure playback RTT.
+MARK_INTERVAL = 100
+
+
+@dataclasses.dataclass
+class TelephonyConfig:
+    session_params: VoiceSessionParams = dataclasses.field(
+        default_factory=VoiceSessionParams
+    )
+    # Websocket path that Twilio's <Stream> connects to.
+    path: str = "/media"
+    # Calls beyond this many at once are rejected with a 503.
+    max_calls: int = 100
+    # Calls are hung up after this many seconds.
+    max_call_seconds: float = 3600.0
+    # Calls are hung up if Twilio sends nothing for this many seconds.
+    idle_timeout: float = 30.0
+    # Largest websocket message we'll accept from Twilio.
+    max_message_bytes: int = 64 * 1024
+    # Bounds on the audio queued in each direction, per call.
+    source_queue_ms: float = twilio.DEFAULT_SOURCE_QUEUE_MS
+    sink_queue_ms: float = audio_channel.DEFAULT_MAX_MS
+    # On shutdown, how long active calls get to finish before we hang up.
+    drain_timeout: float = 30.0
+
+
+@dataclasses.dataclass
+class TelephonyStats:
+    """Counters for a TelephonyServer."""
+
+    active_calls: int = 0
+    total_calls: int = 0
+    rejected_calls: int = 0
+    failed_calls: int = 0
+    draining: bool = False
+
+
+class Call:
+    """A single Twilio media stream, bridged to a voice session."""
+
+    def __init__(
+        self,
+        ws: web.WebSocketResponse,
+        config: TelephonyConfig,
+        session_factory: SessionFactory,
+    ):
+        self._ws = ws
+        self._config = config
+        self._source = twilio.PhoneAudioSource(config.source_queue_ms)
+        self._phone_sink = twilio.PhoneAudioSink(config.sink_queue_ms)
+        # Convert the agent's 48 kHz audio to 8 kHz with one resampler for the whole call.
+        sink = audio_resample.ResamplingAudioSink(self._phone_sink, twilio.SAMPLE_RATE)
+        self._session = session_factory(self._source, sink, config.session_params)
+        self._session.on("error", self._on_error)
+        self._phone_sink.on("clear", self._on_clear)
+        self._stream_sid = ""
+        self._media_sent = 0
+        self._mark_times: dict[str, float] = {}
+
+    @property
+    def session(self) -> VoiceSession:
+        return self._session
+
+    async def run(self):
+        send_task = asyncio.create_task(self._send_audio())
+        try:
+            async with asyncio.timeout(self._config.max_call_seconds) as deadline:
+                try:
+                    await self._receive()
+                except TimeoutError:
+                    if deadline.expired():
+                        raise
+                    logging.info("[telephony] hanging up idle call")
+        except TimeoutError:
+            logging.info("[telephony] hanging up call at the maximum duration")
+        finally:
+            await self._session.stop()
+            self._source.close()
+            send_task.cancel()
+            await self._ws.close()
+
+    async def hang_up(self):
+        await self._ws.close()
+
+    async def _receive(self):
+        async for msg in self._ws:
+            if msg.type != aiohttp.WSMsgType.TEXT:
+                continue
+            data = twilio.parse_message(msg.data)
+            match data["event"]:
+                case "media":
+                    self._source.write(twilio.media_payload(data))
+                case "connected":
+                    # Connect to the voice server while Twilio sets up the stream.
+                    await self._session.warmup()
+                case "start":
+                    self._stream_sid = data["streamSid"]
+                    logging.info(f"[telephony] call started: {self._stream_sid}")
+                    await self._session.start()
+                case "mark":
+                    self._on_mark(data["mark"]["name"])
+                case "stop":
+                    logging.info(f"[telephony] call ended: {self._stream_sid}")
+                    return
+
+    async def _send_audio(self):
+        async for payload in self._phone_sink.payloads():
+            await self._ws.send_str(twilio.media_message(self._stream_sid, payload))
+            self._media_sent += 1
+            if self._media_sent % MARK_INTERVAL == 1:
+                name = str(self._media_sent)
+                self._mark_times[name] = time.perf_counter()
+                await self._ws.send_str(twilio.mark_message(self._stream_sid, name))
+
+    async def _on_clear(self):
+        if self._stream_sid and not self._ws.closed:
+            await self._ws.send_str(twilio.clear_message(self._stream_sid))
+
+    def _on_mark(self, name: str):
+        sent = self._mark_times.pop(name, None)
+        if sent is not None:
+            rtt_ms = (time.perf_counter() - sent) * 1000
+            logging.debug(f"[telephony] playback RTT: {rtt_ms:.0f} ms")
+
+    def _on_error(self, error):
+        logging.error(f"[telephony] session error: {error}")
+
+
+class TelephonyServer:
+    """Accepts Twilio media stream connections and runs a voice session for each."""
+
+    def __init__(
+        self,
+        config: Optional[TelephonyConfig] = None,
+        session_factory: SessionFactory = VoiceSession,
+    ):
+        self._config = config or TelephonyConfig()
+        self._session_factory = session_factory
+        self._calls: dict[Call, asyncio.Task] = {}
+        self._stats = TelephonyStats()
+
+    @property
+    def config(self) -> TelephonyConfig:
+        return self._config
+
+    @property
+    def stats(self) -> TelephonyStats:
+        return dataclasses.replace(self._stats, active_calls=len(self._calls))
+
+    def create_app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_get("/", self._handle_health)
+        app.router.add_get("/stats", self._handle_stats)
+        app.router.add_get(self._config.path, self._handle_call)
+        app.on_shutdown.append(self._on_shutdown)
+        return app
+
+    async def drain(self, timeout: Optional[float] = None):
+        """Stops accepting calls and waits for the active ones to end, then hangs up on the rest."""
+        self._stats.draining = True
+        if not self._calls:
+            return
+        logging.info(f"[telephony] draining {len(self._calls)} calls")
+        _, pending = await asyncio.wait(
+            list(self._calls.values()),
+            timeout=self._config.drain_timeout if timeout is None else timeout,
+        )
+        if pending:
+            logging.warning(f"[telephony] hanging up {len(pending)} calls")
+            await asyncio.gather(*(call.hang_up() for call in list(self._calls)))
+            await asyncio.wait(pending)
+
+    async def _handle_health(self, request: web.Request) -> web.Response:
+        # Tell the load balancer to stop sending us calls while we drain.
+        if self._stats.draining:
+            return web.Response(status=503, text="draining")
+        return web.Response(text="ok")
+
+    async def _handle_stats(self, request: web.Request) -> web.Response:
+        return web.json_response(dataclasses.asdict(self.stats))
+
+    async def _handle_call(self, request: web.Request) -> web.StreamResponse:
+        if self._stats.draining or len(self._calls) >= self._config.max_calls:
+            self._stats.rejected_calls += 1
+            logging.warning("[telephony] rejecting call")
+            return web.Response(status=503)
+
+        ws = web.WebSocketResponse(
+            max_msg_size=self._config.max_message_bytes,
+            receive_timeout=self._config.idle_timeout,
+        )
+        await ws.prepare(request)
+        call = Call(ws, self._config, self._session_factory)
+        task = asyncio.current_task()
+        assert task is not None
+        self._calls[call] = task
+        self._stats.total_calls += 1
+        try:
+            await call.run()
+        except Exception as e:
+            self._stats.failed_calls += 1
+            logging.exception(f"[telephony] call failed: {e}")
+        finally:
+            del self._calls[call]
+        return ws
+
+    async def _on_shutdown(self, app: web.Application):
+        await self.drain()
+
+
+def create_app(
+    config: Optional[TelephonyConfig] = None,
+    session_factory: SessionFactory = VoiceSession,
+) -> web.Application:
+    """Creates an aiohttp application that bridges Twilio calls to voice sessions."""
+    return TelephonyServer(config, session_factory).create_app()
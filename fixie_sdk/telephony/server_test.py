@@ -0,0 +1,95 @@
+import asyncio
+
+import pytest
+from aiohttp import test_utils
+from pyee import asyncio as pyee_asyncio
+
+from fixie_sdk.telephony import server
+from fixie_sdk.telephony import twilio
+
+
+class EchoSession(pyee_asyncio.AsyncIOEventEmitter):
+    """Stand-in for VoiceSession that plays the caller's audio back to them."""
+
+    def __init__(self, source, sink, params):
+        super().__init__()
+        self._source = source
+        self._sink = sink
+        self._task = None
+        self.warmed_up = False
+
+    async def warmup(self):
+        self.warmed_up = True
+
+    async def start(self):
+        await self._sink.start(twilio.SAMPLE_RATE, 1)
+        self._task = asyncio.create_task(self._echo())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            self._task = None
+
+    async def _echo(self):
+        async for chunk in self._source.stream():
+            await self._sink.write(chunk)
+
+
+async def _connect(client, stream_sid: str = "MZ1"):
+    ws = await client.ws_connect("/media")
+    await ws.send_str('{"event": "connected"}')
+    await ws.send_str(f'{{"event": "start", "streamSid": "{stream_sid}"}}')
+    return ws
+
+
+@pytest.fixture
+async def telephony():
+    config = server.TelephonyConfig(max_calls=1, drain_timeout=0.1)
+    telephony_server = server.TelephonyServer(config, EchoSession)
+    client = test_utils.TestClient(test_utils.TestServer(telephony_server.create_app()))
+    await client.start_server()
+    yield telephony_server, client
+    await client.close()
+
+
+@pytest.mark.asyncio
+async def test_call_echoes_audio(telephony):
+    telephony_server, client = telephony
+    ws = await _connect(client)
+    await asyncio.sleep(0.01)
+    await ws.send_str(twilio.media_message("MZ1", b"\x80" * 160))
+    message = twilio.parse_message(await asyncio.wait_for(ws.receive_str(), 1))
+    assert message["event"] == "media"
+    assert message["streamSid"] == "MZ1"
+    assert twilio.media_payload(message) == b"\x80" * 160
+    assert telephony_server.stats.active_calls == 1
+
+    await ws.send_str('{"event": "stop"}')
+    await ws.receive()
+    await ws.close()
+    await asyncio.sleep(0.01)
+    stats = telephony_server.stats
+    assert stats.active_calls == 0
+    assert stats.total_calls == 1
+
+
+@pytest.mark.asyncio
+async def test_rejects_calls_over_limit(telephony):
+    telephony_server, client = telephony
+    ws = await _connect(client)
+    await asyncio.sleep(0.01)
+    response = await client.get("/media")
+    assert response.status == 503
+    assert telephony_server.stats.rejected_calls == 1
+    await ws.close()
+
+
+@pytest.mark.asyncio
+async def test_drain_hangs_up_after_timeout(telephony):
+    telephony_server, client = telephony
+    ws = await _connect(client)
+    await asyncio.sleep(0.01)
+    await telephony_server.drain()
+    assert telephony_server.stats.active_calls == 0
+    assert (await client.get("/")).status == 503
+    await ws.close()
@@ -0,0 +1,112 @@
+"""Audio adapters and message helpers for Twilio Media Streams.
+
+Twilio streams 8 kHz G.711 mu-law audio over a websocket as base64 in JSON
+messages; see https://www.twilio.com/docs/voice/media-streams/websocket-messages.
+"""
+import base64
+from typing import Any, AsyncGenerator, AsyncIterator
+
+from fixie_sdk.voice import audio_base
+from fixie_sdk.voice import audio_channel
+from fixie_sdk.voice import audio_g711
+from fixie_sdk.voice import audio_queue
+from fixie_sdk.voice import json_codec
+
+SAMPLE_RATE = 8000
+# Default amount of caller audio we'll queue; beyond this the oldest audio is
+# dropped to keep latency down.
+DEFAULT_SOURCE_QUEUE_MS = 100
+
+
+def parse_message(data: str | bytes) -> dict[str, Any]:
+    return json_codec.loads(data)
+
+
+def media_message(stream_sid: str, payload: bytes) -> str:
+    """Builds a message that plays G.711 `payload` to the caller."""
+    return json_codec.dumps(
+        {
+            "event": "media",
+            "streamSid": stream_sid,
+            "media": {"payload": base64.b64encode(payload).decode()},
+        }
+    )
+
+
+def mark_message(stream_sid: str, name: str) -> str:
+    """Builds a message that Twilio echoes back once the audio before it has played."""
+    return json_codec.dumps(
+        {"event": "mark", "streamSid": stream_sid, "mark": {"name": name}}
+    )
+
+
+def clear_message(stream_sid: str) -> str:
+    """Builds a message that discards the audio Twilio has buffered for playback."""
+    return json_codec.dumps({"event": "clear", "streamSid": stream_sid})
+
+
+def media_payload(message: dict[str, Any]) -> bytes:
+    """Returns the G.711 audio in a media message."""
+    return base64.b64decode(message["media"]["payload"])
+
+
+class PhoneAudioSource(audio_base.AudioSource):
+    """AudioSource for the caller's audio, fed with G.711 payloads from media messages."""
+
+    def __init__(
+        self,
+        max_queue_ms: float = DEFAULT_SOURCE_QUEUE_MS,
+        law: audio_g711.G711Law = audio_g711.G711Law.ULAW,
+    ):
+        super().__init__(SAMPLE_RATE, 1)
+        self._law = law
+        self._queue = audio_queue.AudioQueue(SAMPLE_RATE, 1, max_queue_ms)
+        self._started = False
+
+    @property
+    def queue_stats(self) -> audio_queue.AudioQueueStats:
+        return self._queue.stats
+
+    def write(self, payload: bytes):
+        # Audio that arrives before the session is streaming is of no use to it.
+        if not self._started:
+            return
+        decoded = audio_g711.decode(payload, self._law)
+        self._queue.put_nowait(audio_base.byte_view(decoded))
+
+    def close(self):
+        self._queue.close()
+
+    async def stream(self) -> AsyncGenerator[audio_base.AudioData, None]:
+        self._started = True
+        async for buf in self._queue:
+            yield buf if self.enabled else audio_base.silence(len(buf))
+
+
+class PhoneAudioSink(audio_channel.ChannelAudioSink):
+    """AudioSink for audio to play to the caller, read back out as G.711 payloads.
+
+    Audio must be written at 8 kHz mono; wrap the sink in a
+    ResamplingAudioSink to convert it.
+    """
+
+    def __init__(
+        self,
+        max_queue_ms: float = audio_channel.DEFAULT_MAX_MS,
+        law: audio_g711.G711Law = audio_g711.G711Law.ULAW,
+    ):
+        super().__init__(max_queue_ms)
+        self._law = law
+
+    async def start(self, sample_rate: int, num_channels: int):
+        if (sample_rate, num_channels) != (SAMPLE_RATE, 1):
+            raise ValueError(
+                f"Phone audio must be {SAMPLE_RATE} Hz mono, got {sample_rate} Hz"
+                f" with {num_channels} channels"
+            )
+        await super().start(sample_rate, num_channels)
+
+    async def payloads(self) -> AsyncIterator[bytes]:
+        """Yields the G.711 encoding of each chunk written, in order, until the sink is closed."""
+        async for chunk in self.channel:
+            yield audio_g711.encode(chunk, self._law).tobytes()
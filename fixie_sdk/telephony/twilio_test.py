@@ -0,0 +1,49 @@
+import numpy as np
+import pytest
+
+from fixie_sdk.telephony import twilio
+
+
+def test_media_message_round_trip():
+    payload = bytes(range(160))
+    message = twilio.parse_message(twilio.media_message("MZ123", payload))
+    assert message["event"] == "media"
+    assert message["streamSid"] == "MZ123"
+    assert twilio.media_payload(message) == payload
+
+
+def test_control_messages():
+    assert twilio.parse_message(twilio.mark_message("MZ1", "7")) == {
+        "event": "mark",
+        "streamSid": "MZ1",
+        "mark": {"name": "7"},
+    }
+    assert twilio.parse_message(twilio.clear_message("MZ1")) == {
+        "event": "clear",
+        "streamSid": "MZ1",
+    }
+
+
+@pytest.mark.asyncio
+async def test_source_decodes_once_streaming():
+    source = twilio.PhoneAudioSource()
+    source.write(b"\xff" * 160)
+    stream = source.stream()
+    assert source.queue_stats.chunks_added == 0
+    source.write(b"\x80" * 160)
+    chunk = await stream.__anext__()
+    samples = np.frombuffer(chunk, np.int16)
+    assert len(samples) == 160
+    assert samples[0] == 32124
+    await stream.aclose()
+
+
+@pytest.mark.asyncio
+async def test_sink_encodes_payloads():
+    sink = twilio.PhoneAudioSink()
+    with pytest.raises(ValueError):
+        await sink.start(48000, 1)
+    await sink.start(8000, 1)
+    await sink.write(bytes(320))
+    await sink.close()
+    assert [payload async for payload in sink.payloads()] == [b"\xff" * 160]
@@ -1,4 +1,27 @@
 import abc
+import asyncio
+import functools
+from typing import Union
+
+# Audio is passed between sources, sinks and adapters as 16-bit PCM in any
+# object that supports the buffer protocol: bytes, bytearray, memoryview or a
+# NumPy array. Producers never modify a buffer after handing it off, so
+# consumers can hold on to it without making a copy.
+AudioData = Union[bytes, bytearray, memoryview]
+
+
+def byte_view(data) -> memoryview:
+    """Returns a flat view of the bytes in `data`, without copying."""
+    view = memoryview(data)
+    if view.format != "B" or view.ndim != 1:
+        view = view.cast("B")
+    return view
+
+
+@functools.lru_cache(maxsize=16)
+def silence(num_bytes: int) -> memoryview:
+    """Returns a shared, read-only buffer of `num_bytes` zero bytes."""
+    return memoryview(bytes(num_bytes))
 
 
 class AudioSource(abc.ABC):
@@ -30,7 +53,15 @@ class AudioSource(abc.ABC):
 
     @abc.abstractmethod
     async def stream(self):
-        pass
+        """Yields chunks of PCM data as AudioData buffers."""
+
+
+class NullAudioSource(AudioSource):
+    """AudioSource that never produces any audio."""
+
+    async def stream(self):
+        await asyncio.Future()
+        yield b""
 
 
 class AudioSink(abc.ABC):
@@ -41,13 +72,19 @@ class AudioSink(abc.ABC):
         """Called from TtsProvider.set_sink to prepare the stream."""
 
     @abc.abstractmethod
-    async def write(self, data: bytes):
-        """Called to write a chunk of PCM data with the specified format."""
+    async def write(self, data: AudioData):
+        """Called to write a chunk of PCM data with the specified format.
+
+        `data` may be any buffer-protocol object; use byte_view to get its size in bytes.
+        """
 
     @abc.abstractmethod
     async def close(self):
         """Called from TtsProvider.close to tear down the stream."""
 
+    async def clear(self):
+        """Discards any audio that has been written but not played yet, e.g. on barge-in."""
+
 
 class NullAudioSink(AudioSink):
     """No-op audio sink."""
@@ -55,7 +92,7 @@ class NullAudioSink(AudioSink):
     async def start(self, sample_rate: int, num_channels: int):
         pass
 
-    async def write(self, data: bytes):
+    async def write(self, data: AudioData):
         pass
 
     async def close(self):
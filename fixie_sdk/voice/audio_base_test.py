@@ -0,0 +1,20 @@
+import numpy as np
+
+from fixie_sdk.voice import audio_base
+
+
+def test_byte_view():
+    samples = np.arange(4, dtype=np.int16)
+    view = audio_base.byte_view(samples)
+    assert view.nbytes == len(view) == 8
+    samples[0] = 7
+    assert view[0] == 7
+    assert audio_base.byte_view(memoryview(samples).cast("B")).nbytes == 8
+    assert audio_base.byte_view(b"\x01\x02").tobytes() == b"\x01\x02"
+
+
+def test_silence_is_shared():
+    silence = audio_base.silence(960)
+    assert silence is audio_base.silence(960)
+    assert silence.readonly
+    assert silence.tobytes() == bytes(960)
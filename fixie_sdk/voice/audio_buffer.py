@@ -0,0 +1,164 @@
+import threading
+from typing import Iterator, Optional
+
+import numpy as np
+
+from fixie_sdk.voice import audio_base
+
+
+class PcmRingBuffer:
+    """Fixed-capacity, thread-safe FIFO of 16-bit PCM frames.
+
+    Storage is allocated once up front. Reads and writes can be any number of
+    frames, so producers and consumers don't need to agree on a chunk size.
+    This is used to hand audio between asyncio code and audio device callbacks,
+    which run on their own thread.
+    """
+
+    def __init__(self, capacity: int, num_channels: int = 1):
+        self._buffer = np.zeros((capacity, num_channels), dtype=np.int16)
+        self._capacity = capacity
+        self._num_channels = num_channels
+        self._lock = threading.Lock()
+        self._read_pos = 0
+        self._size = 0
+        self._starved = True
+        self._underruns = 0
+        self._overruns = 0
+
+    @property
+    def capacity(self) -> int:
+        """Capacity in frames."""
+        return self._capacity
+
+    @property
+    def num_channels(self) -> int:
+        return self._num_channels
+
+    @property
+    def available(self) -> int:
+        """Number of frames waiting to be read."""
+        return self._size
+
+    @property
+    def underruns(self) -> int:
+        """Number of times a reader ran out of data partway through a stream."""
+        return self._underruns
+
+    @property
+    def overruns(self) -> int:
+        """Number of writes that didn't fit and had frames dropped."""
+        return self._overruns
+
+    def write(self, data) -> int:
+        """Appends PCM data (bytes-like or an int16 array) and returns the number of frames stored.
+
+        Frames that don't fit are dropped and counted as an overrun.
+        """
+        frames = self._as_frames(data)
+        with self._lock:
+            count = min(len(frames), self._capacity - self._size)
+            if count < len(frames):
+                self._overruns += 1
+            start = (self._read_pos + self._size) % self._capacity
+            first = min(count, self._capacity - start)
+            self._buffer[start : start + first] = frames[:first]
+            self._buffer[: count - first] = frames[first:count]
+            self._size += count
+            return count
+
+    def read_into(self, out: np.ndarray) -> int:
+        """Fills `out` (frames x channels) with buffered frames and returns how many were copied.
+
+        If there isn't enough data, the rest of `out` is filled with silence.
+        """
+        with self._lock:
+            count = min(len(out), self._size)
+            self._copy_out(out[:count])
+            if count < len(out):
+                out[count:] = 0
+                if not self._starved:
+                    self._starved = True
+                    self._underruns += 1
+            elif count:
+                self._starved = False
+            return count
+
+    def read(self, max_frames: int) -> np.ndarray:
+        """Removes and returns up to `max_frames` frames."""
+        with self._lock:
+            out = np.empty((min(max_frames, self._size), self._num_channels), np.int16)
+            self._copy_out(out)
+            return out
+
+    def clear(self):
+        with self._lock:
+            self._read_pos = 0
+            self._size = 0
+
+    def _as_frames(self, data) -> np.ndarray:
+        samples = (
+            data if isinstance(data, np.ndarray) else np.frombuffer(data, np.int16)
+        )
+        return samples.reshape(-1, self._num_channels)
+
+    def _copy_out(self, out: np.ndarray):
+        count = len(out)
+        first = min(count, self._capacity - self._read_pos)
+        out[:first] = self._buffer[self._read_pos : self._read_pos + first]
+        out[first:] = self._buffer[: count - first]
+        self._read_pos = (self._read_pos + count) % self._capacity
+        self._size -= count
+
+
+class FrameChunker:
+    """Splits a stream of PCM chunks of any size into fixed-duration frames.
+
+    Frames that lie entirely within an input chunk are returned as views of
+    that chunk. Frames that span chunks are assembled in a preallocated buffer,
+    so those views are only valid until the next frame is requested; copy them
+    (as rtc.AudioFrame does) if they need to be kept.
+    """
+
+    def __init__(self, sample_rate: int, num_channels: int = 1, frame_ms: int = 10):
+        self._samples_per_channel = sample_rate * frame_ms // 1000
+        self._frame_bytes = self._samples_per_channel * num_channels * 2
+        self._pending = bytearray(self._frame_bytes)
+        self._pending_size = 0
+
+    @property
+    def samples_per_channel(self) -> int:
+        return self._samples_per_channel
+
+    @property
+    def frame_bytes(self) -> int:
+        return self._frame_bytes
+
+    def push(self, data) -> Iterator[memoryview]:
+        """Adds a chunk and yields each frame that is now complete."""
+        view = audio_base.byte_view(data)
+        offset = 0
+        if self._pending_size:
+            offset = min(len(view), self._frame_bytes - self._pending_size)
+            end = self._pending_size + offset
+            self._pending[self._pending_size : end] = view[:offset]
+            self._pending_size = end
+            if self._pending_size < self._frame_bytes:
+                return
+            self._pending_size = 0
+            yield memoryview(self._pending)
+        while len(view) - offset >= self._frame_bytes:
+            yield view[offset : offset + self._frame_bytes]
+            offset += self._frame_bytes
+        self._pending_size = len(view) - offset
+        self._pending[: self._pending_size] = view[offset:]
+
+    def flush(self) -> Optional[memoryview]:
+        """Returns any remaining partial frame, padded with silence."""
+        if not self._pending_size:
+            return None
+        self._pending[self._pending_size :] = bytes(
+            self._frame_bytes - self._pending_size
+        )
+        self._pending_size = 0
+        return memoryview(self._pending)
@@ -0,0 +1,67 @@
+import numpy as np
+
+from fixie_sdk.voice import audio_buffer
+
+
+def _frames(start: int, count: int) -> bytes:
+    return np.arange(start, start + count, dtype=np.int16).tobytes()
+
+
+def test_ring_buffer_wraps():
+    ring = audio_buffer.PcmRingBuffer(8)
+    assert ring.write(_frames(0, 6)) == 6
+    assert ring.read(4).ravel().tolist() == [0, 1, 2, 3]
+    assert ring.write(_frames(6, 5)) == 5
+    assert ring.available == 7
+    assert ring.read(10).ravel().tolist() == [4, 5, 6, 7, 8, 9, 10]
+    assert ring.available == 0
+
+
+def test_ring_buffer_overrun():
+    ring = audio_buffer.PcmRingBuffer(4)
+    assert ring.write(_frames(0, 6)) == 4
+    assert ring.overruns == 1
+    assert ring.read(4).ravel().tolist() == [0, 1, 2, 3]
+
+
+def test_ring_buffer_read_into_partial():
+    ring = audio_buffer.PcmRingBuffer(16)
+    out = np.full((4, 1), 99, dtype=np.int16)
+    assert ring.read_into(out) == 0
+    assert ring.underruns == 0
+    assert not out.any()
+
+    ring.write(_frames(1, 6))
+    assert ring.read_into(out) == 4
+    assert out.ravel().tolist() == [1, 2, 3, 4]
+    assert ring.read_into(out) == 2
+    assert out.ravel().tolist() == [5, 6, 0, 0]
+    assert ring.underruns == 1
+    assert ring.read_into(out) == 0
+    assert ring.underruns == 1
+
+
+def test_ring_buffer_stereo():
+    ring = audio_buffer.PcmRingBuffer(4, num_channels=2)
+    ring.write(np.array([[1, 2], [3, 4], [5, 6]], dtype=np.int16))
+    assert ring.available == 3
+    assert ring.read(2).tolist() == [[1, 2], [3, 4]]
+
+
+def test_frame_chunker():
+    chunker = audio_buffer.FrameChunker(1000, frame_ms=4)
+    assert chunker.samples_per_channel == 4
+    frames = [bytes(frame) for frame in chunker.push(_frames(0, 3))]
+    assert frames == []
+    frames = [bytes(frame) for frame in chunker.push(_frames(3, 10))]
+    assert frames == [_frames(0, 4), _frames(4, 4), _frames(8, 4)]
+    assert bytes(chunker.flush()) == _frames(12, 1) + bytes(6)
+    assert chunker.flush() is None
+
+
+def test_frame_chunker_whole_frames_are_views():
+    chunker = audio_buffer.FrameChunker(1000, frame_ms=4)
+    data = bytearray(_frames(0, 8))
+    frames = list(chunker.push(data))
+    assert len(frames) == 2
+    assert all(frame.obj is data for frame in frames)
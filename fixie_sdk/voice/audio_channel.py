@@ -0,0 +1,56 @@
+from pyee import asyncio as pyee_asyncio
+
+from fixie_sdk.voice import audio_base
+from fixie_sdk.voice import audio_queue
+
+# Default amount of audio the channel holds before writers have to wait.
+DEFAULT_MAX_MS = 500
+
+
+class ChannelAudioSink(audio_base.AudioSink, pyee_asyncio.AsyncIOEventEmitter):
+    """AudioSink that hands the audio written to it to a consumer through an AudioQueue.
+
+    The consumer reads from `channel` (e.g., with `async for`) and gets the
+    chunks in order. With the default BLOCK policy, writes wait while the
+    consumer is behind, so a slow consumer slows the producer down rather
+    than piling up tasks or memory. Emits "clear" when buffered audio is
+    discarded (e.g., on barge-in) so that the consumer can also drop anything
+    it has queued downstream.
+    """
+
+    def __init__(
+        self,
+        max_ms: float = DEFAULT_MAX_MS,
+        policy: audio_queue.OverflowPolicy = audio_queue.OverflowPolicy.BLOCK,
+    ):
+        super().__init__()
+        self._channel = audio_queue.AudioQueue(max_ms=max_ms, policy=policy)
+        self._sample_rate = 0
+        self._num_channels = 0
+
+    @property
+    def channel(self) -> audio_queue.AudioQueue:
+        return self._channel
+
+    @property
+    def sample_rate(self) -> int:
+        return self._sample_rate
+
+    @property
+    def num_channels(self) -> int:
+        return self._num_channels
+
+    async def start(self, sample_rate: int, num_channels: int):
+        self._sample_rate = sample_rate
+        self._num_channels = num_channels
+        self._channel.set_format(sample_rate, num_channels)
+
+    async def write(self, data: audio_base.AudioData):
+        await self._channel.put(data)
+
+    async def clear(self):
+        self._channel.clear()
+        self.emit("clear")
+
+    async def close(self):
+        self._channel.close()
@@ -0,0 +1,17 @@
+import pytest
+
+from fixie_sdk.voice import audio_channel
+
+
+@pytest.mark.asyncio
+async def test_sink_clear():
+    sink = audio_channel.ChannelAudioSink()
+    cleared = []
+    sink.on("clear", lambda: cleared.append(True))
+    await sink.start(8000, 1)
+    await sink.write(b"a" * 160)
+    await sink.clear()
+    await sink.write(b"b" * 160)
+    await sink.close()
+    assert [bytes(chunk) async for chunk in sink.channel] == [b"b" * 160]
+    assert cleared == [True]
@@ -0,0 +1,118 @@
+"""G.711 mu-law and A-law codecs backed by lookup tables.
+
+Produces the same output as audioop.lin2ulaw/ulaw2lin and lin2alaw/alaw2lin
+(audioop was removed in Python 3.13). Every function accepts either a bytes-like
+object or a NumPy array of any shape, so many chunks or many calls can be
+converted in a single call, and can write into a caller-provided `out` array.
+"""
+import enum
+from typing import Optional, Sequence
+
+import numpy as np
+
+
+class G711Law(enum.StrEnum):
+    ULAW = "ulaw"
+    ALAW = "alaw"
+
+
+_ULAW_SEGMENT_ENDS = np.array(
+    [0x3F, 0x7F, 0xFF, 0x1FF, 0x3FF, 0x7FF, 0xFFF, 0x1FFF], dtype=np.int32
+)
+_ALAW_SEGMENT_ENDS = np.array(
+    [0x1F, 0x3F, 0x7F, 0xFF, 0x1FF, 0x3FF, 0x7FF, 0xFFF], dtype=np.int32
+)
+_ULAW_BIAS = 0x84
+_ULAW_CLIP = 8159
+
+
+def _all_pcm_values() -> np.ndarray:
+    """Every int16 value, ordered so that it can be indexed by the value's uint16 view."""
+    return np.arange(65536, dtype=np.uint32).astype(np.uint16).view(np.int16)
+
+
+def _build_ulaw_encode_table() -> np.ndarray:
+    pcm = _all_pcm_values().astype(np.int32) >> 2
+    mask = np.where(pcm < 0, 0x7F, 0xFF)
+    magnitude = np.minimum(np.abs(pcm), _ULAW_CLIP) + (_ULAW_BIAS >> 2)
+    segment = np.searchsorted(_ULAW_SEGMENT_ENDS, magnitude)
+    quantized = (segment << 4) | ((magnitude >> (segment + 1)) & 0xF)
+    table = np.where(segment >= 8, 0x7F ^ mask, quantized ^ mask)
+    return table.astype(np.uint8)
+
+
+def _build_ulaw_decode_table() -> np.ndarray:
+    ulaw = ~np.arange(256, dtype=np.int32) & 0xFF
+    magnitude = (((ulaw & 0x0F) << 3) + _ULAW_BIAS) << ((ulaw & 0x70) >> 4)
+    table = np.where(ulaw & 0x80, _ULAW_BIAS - magnitude, magnitude - _ULAW_BIAS)
+    return table.astype(np.int16)
+
+
+def _build_alaw_encode_table() -> np.ndarray:
+    pcm = _all_pcm_values().astype(np.int32) >> 3
+    mask = np.where(pcm >= 0, 0xD5, 0x55)
+    magnitude = np.where(pcm >= 0, pcm, -pcm - 1)
+    segment = np.searchsorted(_ALAW_SEGMENT_ENDS, magnitude)
+    shift = np.maximum(segment, 1)
+    quantized = (segment << 4) | ((magnitude >> shift) & 0xF)
+    table = np.where(segment >= 8, 0x7F ^ mask, quantized ^ mask)
+    return table.astype(np.uint8)
+
+
+def _build_alaw_decode_table() -> np.ndarray:
+    alaw = np.arange(256, dtype=np.int32) ^ 0x55
+    segment = (alaw & 0x70) >> 4
+    magnitude = ((alaw & 0x0F) << 4) + np.where(segment == 0, 8, 0x108)
+    magnitude = np.where(
+        segment > 1, magnitude << np.maximum(segment - 1, 0), magnitude
+    )
+    table = np.where(alaw & 0x80, magnitude, -magnitude)
+    return table.astype(np.int16)
+
+
+_ENCODE_TABLES = {
+    G711Law.ULAW: _build_ulaw_encode_table(),
+    G711Law.ALAW: _build_alaw_encode_table(),
+}
+_DECODE_TABLES = {
+    G711Law.ULAW: _build_ulaw_decode_table(),
+    G711Law.ALAW: _build_alaw_decode_table(),
+}
+
+
+def encode(
+    pcm, law: G711Law = G711Law.ULAW, out: Optional[np.ndarray] = None
+) -> np.ndarray:
+    """Encodes 16-bit PCM samples into 8-bit G.711 codes of the same shape."""
+    samples = pcm if isinstance(pcm, np.ndarray) else np.frombuffer(pcm, np.int16)
+    return np.take(_ENCODE_TABLES[law], samples.view(np.uint16), out=out)
+
+
+def decode(
+    data, law: G711Law = G711Law.ULAW, out: Optional[np.ndarray] = None
+) -> np.ndarray:
+    """Decodes 8-bit G.711 codes into 16-bit PCM samples of the same shape."""
+    codes = data if isinstance(data, np.ndarray) else np.frombuffer(data, np.uint8)
+    return np.take(_DECODE_TABLES[law], codes, out=out)
+
+
+def encode_chunks(chunks: Sequence[bytes], law: G711Law = G711Law.ULAW) -> list[bytes]:
+    """Encodes several PCM chunks, e.g. one per call, with a single table lookup."""
+    encoded = encode(b"".join(chunks), law).tobytes()
+    return _split(encoded, [len(chunk) // 2 for chunk in chunks])
+
+
+def decode_chunks(chunks: Sequence[bytes], law: G711Law = G711Law.ULAW) -> list[bytes]:
+    """Decodes several G.711 chunks, e.g. one per call, with a single table lookup."""
+    decoded = decode(b"".join(chunks), law).tobytes()
+    return _split(decoded, [len(chunk) * 2 for chunk in chunks])
+
+
+def _split(data: bytes, sizes: list[int]) -> list[bytes]:
+    view = memoryview(data)
+    chunks = []
+    offset = 0
+    for size in sizes:
+        chunks.append(bytes(view[offset : offset + size]))
+        offset += size
+    return chunks
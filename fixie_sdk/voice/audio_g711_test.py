@@ -0,0 +1,52 @@
+import warnings
+
+import numpy as np
+import pytest
+
+from fixie_sdk.voice import audio_g711
+
+with warnings.catch_warnings():
+    warnings.simplefilter("ignore", DeprecationWarning)
+    audioop = pytest.importorskip("audioop")
+
+ALL_PCM = np.arange(-32768, 32768, dtype=np.int16)
+ALL_CODES = np.arange(256, dtype=np.uint8)
+
+
+def test_ulaw_matches_audioop():
+    encoded = audio_g711.encode(ALL_PCM, audio_g711.G711Law.ULAW)
+    assert encoded.tobytes() == audioop.lin2ulaw(ALL_PCM.tobytes(), 2)
+    decoded = audio_g711.decode(ALL_CODES, audio_g711.G711Law.ULAW)
+    assert decoded.tobytes() == audioop.ulaw2lin(ALL_CODES.tobytes(), 2)
+
+
+def test_alaw_matches_audioop():
+    encoded = audio_g711.encode(ALL_PCM, audio_g711.G711Law.ALAW)
+    assert encoded.tobytes() == audioop.lin2alaw(ALL_PCM.tobytes(), 2)
+    decoded = audio_g711.decode(ALL_CODES, audio_g711.G711Law.ALAW)
+    assert decoded.tobytes() == audioop.alaw2lin(ALL_CODES.tobytes(), 2)
+
+
+def test_bytes_and_out_buffer():
+    pcm = np.array([0, 1000, -1000, 32767], dtype=np.int16)
+    out = np.empty(4, dtype=np.uint8)
+    result = audio_g711.encode(pcm.tobytes(), out=out)
+    assert result is out
+    decoded = np.empty(4, dtype=np.int16)
+    audio_g711.decode(out.tobytes(), out=decoded)
+    assert np.abs(decoded.astype(int) - pcm).max() < 1100
+
+
+def test_batch_of_calls():
+    calls = np.random.default_rng(0).integers(-32768, 32767, (8, 160), dtype=np.int16)
+    encoded = audio_g711.encode(calls)
+    assert encoded.shape == (8, 160)
+    assert encoded[3].tobytes() == audioop.lin2ulaw(calls[3].tobytes(), 2)
+
+
+def test_chunks():
+    chunks = [b"\x00\x10" * 80, b"\x00\xf0" * 160]
+    encoded = audio_g711.encode_chunks(chunks)
+    assert encoded == [audioop.lin2ulaw(chunk, 2) for chunk in chunks]
+    decoded = audio_g711.decode_chunks(encoded)
+    assert decoded == [audioop.ulaw2lin(chunk, 2) for chunk in encoded]
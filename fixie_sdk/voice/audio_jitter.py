@@ -0,0 +1,148 @@
+import collections
+import dataclasses
+from typing import Optional
+
+import numpy as np
+
+from fixie_sdk.voice import audio_base
+
+# Default bounds for the playout delay the buffer will target.
+DEFAULT_MIN_MS = 20
+DEFAULT_MAX_MS = 200
+# How many multiples of the measured jitter to keep buffered on top of one frame.
+JITTER_MULTIPLIER = 3.0
+# Smoothing factor for the jitter estimate, as in RFC 3550.
+JITTER_SMOOTHING = 1 / 16
+# Number of frames we repeat (with decreasing volume) before concealing with silence.
+PLC_REPEAT_FRAMES = 3
+# After this many concealed frames in a row we assume the stream has paused
+# and stop producing output until new frames arrive.
+MAX_CONCEALED_FRAMES = 20
+# Minimum number of frames played between dropping frames to shrink the buffer.
+SHRINK_INTERVAL_FRAMES = 10
+
+
+@dataclasses.dataclass
+class JitterBufferStats:
+    """Snapshot of a JitterBuffer's state and counters."""
+
+    depth_ms: float = 0
+    target_ms: float = 0
+    jitter_ms: float = 0
+    frames_received: int = 0
+    frames_played: int = 0
+    frames_concealed: int = 0
+    frames_dropped: int = 0
+
+
+class JitterBuffer:
+    """Adaptive playout buffer for 16-bit PCM frames received from the network.
+
+    Frames are pushed as they arrive and popped on a steady clock. The target
+    depth follows the measured inter-arrival jitter between `min_ms` and
+    `max_ms`. When the buffer runs dry, the last frame is repeated at
+    decreasing volume and then silence is played until the buffer refills to
+    the target. If the buffer grows past the target, frames are dropped to
+    bring the delay back down.
+    """
+
+    def __init__(self, min_ms: float = DEFAULT_MIN_MS, max_ms: float = DEFAULT_MAX_MS):
+        self._min_ms = min_ms
+        self._max_ms = max_ms
+        self._frames: collections.deque[
+            tuple[audio_base.AudioData, float]
+        ] = collections.deque()
+        self._frame_ms = 0.0
+        self._depth_ms = 0.0
+        self._jitter_ms = 0.0
+        self._last_arrival: Optional[float] = None
+        self._last_frame: Optional[np.ndarray] = None
+        self._buffering = True
+        self._concealed_run = 0
+        self._frames_since_shrink = 0
+        self._stats = JitterBufferStats()
+
+    @property
+    def frame_ms(self) -> float:
+        """Duration of the most recently received frame."""
+        return self._frame_ms
+
+    @property
+    def target_ms(self) -> float:
+        target = self._frame_ms + JITTER_MULTIPLIER * self._jitter_ms
+        return min(max(target, self._min_ms), self._max_ms)
+
+    @property
+    def stats(self) -> JitterBufferStats:
+        return dataclasses.replace(
+            self._stats,
+            depth_ms=self._depth_ms,
+            target_ms=self.target_ms,
+            jitter_ms=self._jitter_ms,
+        )
+
+    def push(self, frame: audio_base.AudioData, duration_ms: float, arrival: float):
+        """Adds a frame that arrived at `arrival` (in seconds, on any monotonic clock)."""
+        if self._last_arrival is not None:
+            transit_delta = (arrival - self._last_arrival) * 1000 - self._frame_ms
+            self._jitter_ms += (abs(transit_delta) - self._jitter_ms) * JITTER_SMOOTHING
+        self._last_arrival = arrival
+        self._frame_ms = duration_ms
+        self._stats.frames_received += 1
+
+        self._frames.append((frame, duration_ms))
+        self._depth_ms += duration_ms
+        # Frames that arrive after the buffer is already full are too late to
+        # be played in order without exceeding the maximum delay.
+        while self._depth_ms > self._max_ms:
+            self._drop_oldest()
+
+    def pop(self) -> Optional[audio_base.AudioData]:
+        """Returns the next frame to play, a concealment frame, or None if the stream is paused."""
+        if self._buffering:
+            if self._frames and self._depth_ms >= self.target_ms:
+                self._buffering = False
+            else:
+                return self._conceal()
+
+        if not self._frames:
+            self._buffering = True
+            return self._conceal()
+
+        self._frames_since_shrink += 1
+        if (
+            self._depth_ms - self._frame_ms > self.target_ms + self._frame_ms
+            and self._frames_since_shrink >= SHRINK_INTERVAL_FRAMES
+        ):
+            self._drop_oldest()
+            self._frames_since_shrink = 0
+
+        frame, duration_ms = self._frames.popleft()
+        self._depth_ms -= duration_ms
+        self._last_frame = np.frombuffer(frame, dtype=np.int16)
+        self._concealed_run = 0
+        self._stats.frames_played += 1
+        return frame
+
+    def clear(self):
+        """Discards all buffered frames without concealing them."""
+        self._stats.frames_dropped += len(self._frames)
+        self._frames.clear()
+        self._depth_ms = 0.0
+        self._last_frame = None
+        self._buffering = True
+
+    def _drop_oldest(self):
+        _, duration_ms = self._frames.popleft()
+        self._depth_ms -= duration_ms
+        self._stats.frames_dropped += 1
+
+    def _conceal(self) -> Optional[audio_base.AudioData]:
+        if self._last_frame is None or self._concealed_run >= MAX_CONCEALED_FRAMES:
+            return None
+        self._concealed_run += 1
+        self._stats.frames_concealed += 1
+        if self._concealed_run > PLC_REPEAT_FRAMES:
+            return audio_base.silence(self._last_frame.nbytes)
+        gain = 0.5**self._concealed_run
+        return audio_base.byte_view((self._last_frame * gain).astype(np.int16))
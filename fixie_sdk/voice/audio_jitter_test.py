@@ -0,0 +1,64 @@
+import numpy as np
+
+from fixie_sdk.voice import audio_jitter
+
+FRAME = np.full(480, 1000, dtype=np.int16).tobytes()
+
+
+def test_waits_for_target_depth():
+    buffer = audio_jitter.JitterBuffer(min_ms=30)
+    buffer.push(FRAME, 10, 0.00)
+    assert buffer.pop() is None
+    buffer.push(FRAME, 10, 0.01)
+    buffer.push(FRAME, 10, 0.02)
+    assert buffer.pop() == FRAME
+    assert buffer.stats.frames_played == 1
+    assert buffer.stats.depth_ms == 20
+
+
+def test_conceals_underrun():
+    buffer = audio_jitter.JitterBuffer(min_ms=10)
+    buffer.push(FRAME, 10, 0.0)
+    assert buffer.pop() == FRAME
+    concealed = np.frombuffer(buffer.pop(), dtype=np.int16)
+    assert concealed.max() == 500
+    for _ in range(audio_jitter.PLC_REPEAT_FRAMES):
+        frame = buffer.pop()
+    assert frame == bytes(len(FRAME))
+    for _ in range(audio_jitter.MAX_CONCEALED_FRAMES):
+        frame = buffer.pop()
+    assert frame is None
+    assert buffer.stats.frames_concealed == audio_jitter.MAX_CONCEALED_FRAMES
+
+
+def test_target_grows_with_jitter():
+    buffer = audio_jitter.JitterBuffer()
+    arrival = 0.0
+    for i in range(200):
+        # Frames arrive in bursts of four every 40 ms.
+        arrival += 0.04 if i % 4 == 0 else 0.0
+        buffer.push(FRAME, 10, arrival)
+        buffer.pop()
+    stats = buffer.stats
+    assert stats.jitter_ms > 10
+    assert stats.target_ms > 40
+
+
+def test_drops_frames_past_max_depth():
+    buffer = audio_jitter.JitterBuffer(max_ms=50)
+    for i in range(10):
+        buffer.push(FRAME, 10, 0.0)
+    stats = buffer.stats
+    assert stats.depth_ms == 50
+    assert stats.frames_dropped == 5
+
+
+def test_clear_discards_without_concealment():
+    buffer = audio_jitter.JitterBuffer(min_ms=10)
+    buffer.push(FRAME, 10, 0.0)
+    buffer.push(FRAME, 10, 0.01)
+    assert buffer.pop() == FRAME
+    buffer.clear()
+    assert buffer.pop() is None
+    assert buffer.stats.depth_ms == 0
+    assert buffer.stats.frames_dropped == 1
@@ -1,10 +1,12 @@
 import asyncio
+import enum
 from typing import AsyncGenerator, Optional
 
 import numpy as np
 import pydub
 
 from fixie_sdk.voice import audio_base
+from fixie_sdk.voice import audio_buffer
 
 try:
     import sounddevice as sd
@@ -14,26 +16,54 @@ except OSError:
     sd_imported = False
 
 
+class LatencyMode(enum.StrEnum):
+    """Trade-off between latency and CPU wakeups for the audio device."""
+
+    LOW = "low"
+    POWER_SAVING = "power_saving"
+
+
+# Device callback block size for each latency mode.
+BLOCK_MS = {LatencyMode.LOW: 10, LatencyMode.POWER_SAVING: 40}
+# The latency hint passed to sounddevice for each latency mode.
+DEVICE_LATENCY = {LatencyMode.LOW: "low", LatencyMode.POWER_SAVING: "high"}
+# Default amount of audio that can be buffered between the device and our code.
+DEFAULT_BUFFER_MS = 500
+
+
 class LocalAudioSink(audio_base.AudioSink):
     """AudioSink that plays to the default audio device."""
 
-    def __init__(self) -> None:
+    def __init__(
+        self,
+        latency_mode: LatencyMode = LatencyMode.LOW,
+        buffer_ms: int = DEFAULT_BUFFER_MS,
+    ) -> None:
         super().__init__()
-        self._queue: asyncio.Queue[bytes] = asyncio.Queue()
+        self._latency_mode = latency_mode
+        self._buffer_ms = buffer_ms
+        self._buffer: Optional[audio_buffer.PcmRingBuffer] = None
         self._stream: Optional[sd.OutputStream] = None
 
+    @property
+    def underruns(self) -> int:
+        return self._buffer.underruns if self._buffer else 0
+
+    @property
+    def overruns(self) -> int:
+        return self._buffer.overruns if self._buffer else 0
+
     async def start(self, sample_rate: int = 48000, num_channels: int = 1):
         if not sd_imported:
             raise RuntimeError("Failed to import sounddevice")
 
+        buffer = audio_buffer.PcmRingBuffer(
+            sample_rate * self._buffer_ms // 1000, num_channels
+        )
+        self._buffer = buffer
+
         def callback(outdata: np.ndarray, frame_count, time, status):
-            try:
-                data = self._queue.get_nowait()
-            except asyncio.QueueEmpty:
-                data = b"\x00" * len(outdata) * 2
-            outdata[:] = np.frombuffer(data, dtype="int16").reshape(
-                (frame_count, num_channels)
-            )
+            buffer.read_into(outdata)
 
         self._stream = sd.OutputStream(
             samplerate=sample_rate,
@@ -41,14 +71,20 @@ class LocalAudioSink(audio_base.AudioSink):
             callback=callback,
             device=None,
             dtype="int16",
-            blocksize=sample_rate // 100,
+            blocksize=sample_rate * BLOCK_MS[self._latency_mode] // 1000,
+            latency=DEVICE_LATENCY[self._latency_mode],
         )
         self._stream.start()
         if not self._stream.active:
             raise RuntimeError("Failed to open audio output stream")
 
-    async def write(self, chunk: bytes) -> None:
-        await self._queue.put(chunk)
+    async def write(self, chunk: audio_base.AudioData) -> None:
+        assert self._buffer is not None
+        self._buffer.write(chunk)
+
+    async def clear(self) -> None:
+        if self._buffer:
+            self._buffer.clear()
 
     async def close(self) -> None:
         if self._stream:
@@ -58,17 +94,44 @@ class LocalAudioSink(audio_base.AudioSink):
 class LocalAudioSource(audio_base.AudioSource):
     """AudioSource that reads from the default microphone."""
 
-    def __init__(self, sample_rate=48000, channels=1):
+    def __init__(
+        self,
+        sample_rate=48000,
+        channels=1,
+        latency_mode: LatencyMode = LatencyMode.LOW,
+        buffer_ms: int = DEFAULT_BUFFER_MS,
+    ):
         super().__init__(sample_rate, channels)
+        self._latency_mode = latency_mode
+        self._buffer = audio_buffer.PcmRingBuffer(
+            sample_rate * buffer_ms // 1000, channels
+        )
 
-    async def stream(self) -> AsyncGenerator[bytes, None]:
+    @property
+    def underruns(self) -> int:
+        return self._buffer.underruns
+
+    @property
+    def overruns(self) -> int:
+        return self._buffer.overruns
+
+    async def stream(self) -> AsyncGenerator[audio_base.AudioData, None]:
         if not sd_imported:
             raise RuntimeError("Failed to import sounddevice")
-        queue: asyncio.Queue[bytes] = asyncio.Queue()
-        loop = asyncio.get_event_loop()
+        block_frames = self._sample_rate * BLOCK_MS[self._latency_mode] // 1000
+        buffer = self._buffer
+        buffer.clear()
+        loop = asyncio.get_running_loop()
+        ready = asyncio.Event()
+        waiting = False
 
         def callback(indata: np.ndarray, frame_count, time, status):
-            loop.call_soon_threadsafe(queue.put_nowait, indata.tobytes())
+            nonlocal waiting
+            buffer.write(indata)
+            # Only wake up the event loop if the reader is waiting for data.
+            if waiting:
+                waiting = False
+                loop.call_soon_threadsafe(ready.set)
 
         stream = sd.InputStream(
             samplerate=self._sample_rate,
@@ -76,14 +139,21 @@ class LocalAudioSource(audio_base.AudioSource):
             callback=callback,
             device=None,
             dtype="int16",
-            blocksize=self._sample_rate // 100,
+            blocksize=block_frames,
+            latency=DEVICE_LATENCY[self._latency_mode],
         )
         with stream:
             if not stream.active:
                 raise RuntimeError("Failed to open audio input stream")
             while True:
-                buf = await queue.get()
-                yield buf if self.enabled else b"\x00" * len(buf)
+                if buffer.available < block_frames:
+                    ready.clear()
+                    waiting = True
+                    if buffer.available < block_frames:
+                        await ready.wait()
+                    continue
+                buf = audio_base.byte_view(buffer.read(block_frames))
+                yield buf if self.enabled else audio_base.silence(len(buf))
 
 
 class WavAudioSource(audio_base.AudioSource):
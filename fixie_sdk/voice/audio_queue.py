@@ -0,0 +1,227 @@
+import asyncio
+import collections
+import dataclasses
+import enum
+import logging
+from typing import AsyncIterator, Optional
+
+import numpy as np
+
+from fixie_sdk.voice import audio_base
+
+# Default bound on the audio a queue holds, and so on the latency it adds.
+DEFAULT_MAX_MS = 200
+# Time-stretching shortens an incoming chunk by at most this fraction; any
+# remaining overflow is handled by dropping the oldest audio.
+MAX_STRETCH = 0.25
+# Length of the crossfade used to splice audio together when time-stretching.
+CROSSFADE_MS = 2.5
+
+
+class OverflowPolicy(enum.StrEnum):
+    """What an AudioQueue does with audio that doesn't fit."""
+
+    # Discard the oldest queued audio; keeps latency lowest.
+    DROP_OLDEST = "drop_oldest"
+    # Discard the audio being added.
+    DROP_NEWEST = "drop_newest"
+    # Make the writer wait for room (put_nowait drops the new audio instead).
+    BLOCK = "block"
+    # Shorten the audio being added by splicing out a segment, which is less
+    # audible than a gap, and drop the oldest audio if that isn't enough.
+    TIME_STRETCH = "time_stretch"
+
+
+@dataclasses.dataclass
+class AudioQueueStats:
+    """Depth and overflow counters for an AudioQueue."""
+
+    depth_ms: float = 0
+    max_depth_ms: float = 0
+    chunks_added: int = 0
+    chunks_dropped: int = 0
+    dropped_ms: float = 0
+    stretched_ms: float = 0
+    blocked_puts: int = 0
+
+
+class AudioQueue:
+    """FIFO of 16-bit PCM chunks, bounded by the duration of the audio it holds.
+
+    The queue never holds more than `max_ms` of audio, so it never adds more
+    than that much latency; `policy` decides what happens to audio that
+    doesn't fit. The consumer reads with get() or `async for`; after close(),
+    the remaining chunks are delivered and then iteration ends.
+    """
+
+    def __init__(
+        self,
+        sample_rate: int = 48000,
+        num_channels: int = 1,
+        max_ms: float = DEFAULT_MAX_MS,
+        policy: OverflowPolicy = OverflowPolicy.DROP_OLDEST,
+    ):
+        self._chunks: collections.deque[
+            tuple[audio_base.AudioData, float]
+        ] = collections.deque()
+        self._max_ms = max_ms
+        self._policy = policy
+        self._depth_ms = 0.0
+        self._not_empty = asyncio.Event()
+        self._not_full = asyncio.Event()
+        self._not_full.set()
+        self._closed = False
+        self._stats = AudioQueueStats()
+        self.set_format(sample_rate, num_channels)
+
+    @property
+    def max_ms(self) -> float:
+        return self._max_ms
+
+    @property
+    def policy(self) -> OverflowPolicy:
+        return self._policy
+
+    @property
+    def depth_ms(self) -> float:
+        return self._depth_ms
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    @property
+    def stats(self) -> AudioQueueStats:
+        return dataclasses.replace(self._stats, depth_ms=self._depth_ms)
+
+    def __len__(self) -> int:
+        return len(self._chunks)
+
+    def set_format(self, sample_rate: int, num_channels: int):
+        """Sets the format used to work out the duration of chunks."""
+        self._sample_rate = sample_rate
+        self._num_channels = num_channels
+        self._bytes_per_ms = sample_rate * num_channels * 2 / 1000
+
+    async def put(self, data: audio_base.AudioData):
+        """Adds a chunk, applying the overflow policy. Chunks put after close() are dropped."""
+        if self._policy == OverflowPolicy.BLOCK:
+            duration_ms = self._duration_ms(data)
+            if self._depth_ms + duration_ms > self._max_ms and not self._closed:
+                self._stats.blocked_puts += 1
+            # A chunk longer than the whole queue is let in once the queue is empty.
+            while (
+                self._depth_ms + duration_ms > self._max_ms
+                and self._chunks
+                and not self._closed
+            ):
+                self._not_full.clear()
+                await self._not_full.wait()
+        self.put_nowait(data)
+
+    def put_nowait(self, data: audio_base.AudioData) -> bool:
+        """Adds a chunk without waiting and returns whether any of it was kept.
+
+        With the BLOCK policy, a chunk that doesn't fit is dropped.
+        """
+        if self._closed:
+            return False
+        duration_ms = self._duration_ms(data)
+        overflow_ms = self._depth_ms + duration_ms - self._max_ms
+        if overflow_ms > 0:
+            match self._policy:
+                case OverflowPolicy.DROP_NEWEST | OverflowPolicy.BLOCK if (
+                    self._chunks
+                ):
+                    self._count_drop(duration_ms)
+                    return False
+                case OverflowPolicy.TIME_STRETCH:
+                    data = self._stretch(data, overflow_ms)
+                    duration_ms = self._duration_ms(data)
+            while self._chunks and self._depth_ms + duration_ms > self._max_ms:
+                _, dropped_ms = self._chunks.popleft()
+                self._depth_ms -= dropped_ms
+                self._count_drop(dropped_ms)
+            if duration_ms > self._max_ms:
+                data, duration_ms = self._keep_tail(data)
+        self._chunks.append((data, duration_ms))
+        self._depth_ms += duration_ms
+        self._stats.chunks_added += 1
+        self._stats.max_depth_ms = max(self._stats.max_depth_ms, self._depth_ms)
+        self._not_empty.set()
+        return True
+
+    async def get(self) -> Optional[audio_base.AudioData]:
+        """Returns the next chunk, or None once the queue is closed and drained."""
+        while not self._chunks:
+            if self._closed:
+                return None
+            self._not_empty.clear()
+            await self._not_empty.wait()
+        data, duration_ms = self._chunks.popleft()
+        self._depth_ms = max(0.0, self._depth_ms - duration_ms)
+        self._not_full.set()
+        return data
+
+    def clear(self) -> int:
+        """Discards the queued chunks and returns how many there were."""
+        count = len(self._chunks)
+        self._chunks.clear()
+        self._depth_ms = 0.0
+        self._not_full.set()
+        return count
+
+    def close(self):
+        self._closed = True
+        self._not_empty.set()
+        self._not_full.set()
+
+    async def __aiter__(self) -> AsyncIterator[audio_base.AudioData]:
+        while (data := await self.get()) is not None:
+            yield data
+
+    def _duration_ms(self, data: audio_base.AudioData) -> float:
+        return audio_base.byte_view(data).nbytes / self._bytes_per_ms
+
+    def _count_drop(self, duration_ms: float):
+        if not self._stats.chunks_dropped:
+            logging.warning("[queue] audio queue overflowed, dropping audio")
+        self._stats.chunks_dropped += 1
+        self._stats.dropped_ms += duration_ms
+
+    def _keep_tail(
+        self, data: audio_base.AudioData
+    ) -> tuple[audio_base.AudioData, float]:
+        view = audio_base.byte_view(data)
+        frame_bytes = self._num_channels * 2
+        keep = int(self._max_ms * self._bytes_per_ms) // frame_bytes * frame_bytes
+        self._stats.dropped_ms += (view.nbytes - keep) / self._bytes_per_ms
+        return view[view.nbytes - keep :], keep / self._bytes_per_ms
+
+    def _stretch(
+        self, data: audio_base.AudioData, overflow_ms: float
+    ) -> audio_base.AudioData:
+        frames = np.frombuffer(data, dtype=np.int16).reshape(-1, self._num_channels)
+        fade = int(self._sample_rate * CROSSFADE_MS / 1000)
+        remove = int(
+            min(overflow_ms * self._sample_rate / 1000, len(frames) * MAX_STRETCH)
+        )
+        if remove <= 0 or len(frames) < remove + 2 * fade:
+            return data
+        shortened = splice(frames, remove, fade)
+        self._stats.stretched_ms += remove * 1000 / self._sample_rate
+        return audio_base.byte_view(shortened)
+
+
+def splice(frames: np.ndarray, remove: int, fade: int) -> np.ndarray:
+    """Shortens `frames` (samples x channels) by `remove` samples, crossfading across the cut.
+
+    The cut is made in the middle of the chunk, where the audio on either
+    side is most likely to be similar.
+    """
+    start = (len(frames) - remove - fade) // 2
+    ramp = np.linspace(0.0, 1.0, fade, dtype=np.float32)[:, np.newaxis]
+    before = frames[start : start + fade].astype(np.float32)
+    after = frames[start + remove : start + remove + fade].astype(np.float32)
+    crossfade = (before * (1 - ramp) + after * ramp).astype(np.int16)
+    return np.concatenate([frames[:start], crossfade, frames[start + remove + fade :]])
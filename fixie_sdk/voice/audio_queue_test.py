@@ -0,0 +1,100 @@
+import asyncio
+
+import numpy as np
+import pytest
+
+from fixie_sdk.voice import audio_queue
+from fixie_sdk.voice.audio_queue import OverflowPolicy
+
+# 10 ms of 8 kHz mono audio.
+CHUNK_BYTES = 160
+
+
+def _chunk(value: int) -> bytes:
+    return np.full(CHUNK_BYTES // 2, value, dtype=np.int16).tobytes()
+
+
+def _queue(policy: OverflowPolicy, max_ms: float = 30) -> audio_queue.AudioQueue:
+    return audio_queue.AudioQueue(8000, 1, max_ms, policy)
+
+
+def _first_values(queue: audio_queue.AudioQueue) -> list[int]:
+    return [int(np.frombuffer(chunk, np.int16)[0]) for chunk, _ in queue._chunks]
+
+
+@pytest.mark.asyncio
+async def test_preserves_order_and_drains_on_close():
+    queue = _queue(OverflowPolicy.BLOCK, max_ms=100)
+    for i in range(5):
+        await queue.put(_chunk(i))
+    assert queue.depth_ms == 50
+    queue.close()
+    await queue.put(_chunk(9))
+    assert [int(np.frombuffer(c, np.int16)[0]) async for c in queue] == list(range(5))
+    assert await queue.get() is None
+
+
+def test_drop_oldest():
+    queue = _queue(OverflowPolicy.DROP_OLDEST)
+    for i in range(5):
+        assert queue.put_nowait(_chunk(i))
+    assert _first_values(queue) == [2, 3, 4]
+    stats = queue.stats
+    assert stats.depth_ms == 30
+    assert stats.chunks_dropped == 2
+    assert stats.dropped_ms == 20
+    assert stats.max_depth_ms == 30
+
+
+def test_drop_newest():
+    queue = _queue(OverflowPolicy.DROP_NEWEST)
+    results = [queue.put_nowait(_chunk(i)) for i in range(5)]
+    assert results == [True, True, True, False, False]
+    assert _first_values(queue) == [0, 1, 2]
+
+
+def test_oversized_chunk_keeps_tail():
+    queue = _queue(OverflowPolicy.DROP_NEWEST)
+    data = np.arange(400, dtype=np.int16).tobytes()  # 50 ms
+    queue.put_nowait(data)
+    assert queue.depth_ms == 30
+    chunk, _ = queue._chunks[0]
+    assert np.frombuffer(chunk, np.int16)[0] == 160
+
+
+def test_time_stretch():
+    queue = _queue(OverflowPolicy.TIME_STRETCH, max_ms=100)
+    for i in range(9):
+        queue.put_nowait(_chunk(i))
+    # A 20 ms chunk that overflows by 10 ms is shortened by 25% (5 ms)...
+    queue.put_nowait(_chunk(9) * 2)
+    assert queue.stats.stretched_ms == 5
+    # ...and the remaining 5 ms of overflow drops the oldest chunk.
+    assert queue.depth_ms == 95
+    assert _first_values(queue)[0] == 1
+    assert queue.stats.chunks_dropped == 1
+
+
+def test_splice_crossfades():
+    frames = np.concatenate(
+        [np.full(100, 1000, np.int16), np.full(100, -1000, np.int16)]
+    ).reshape(-1, 1)
+    shortened = audio_queue.splice(frames, 40, 20)
+    assert len(shortened) == 160
+    # No sample jumps by more than the crossfade step.
+    assert np.abs(np.diff(shortened[:, 0].astype(np.int32))).max() <= 2000
+
+
+@pytest.mark.asyncio
+async def test_block_waits_for_room():
+    queue = _queue(OverflowPolicy.BLOCK, max_ms=20)
+    await queue.put(_chunk(0))
+    await queue.put(_chunk(1))
+    put = asyncio.create_task(queue.put(_chunk(2)))
+    await asyncio.sleep(0.01)
+    assert not put.done()
+    await queue.get()
+    await asyncio.wait_for(put, 1)
+    assert _first_values(queue) == [1, 2]
+    assert queue.stats.blocked_puts == 1
+    assert queue.stats.chunks_dropped == 0
@@ -0,0 +1,154 @@
+import enum
+from typing import AsyncGenerator, Optional
+
+import numpy as np
+import soxr
+
+from fixie_sdk.voice import audio_base
+
+
+class ResampleQuality(enum.StrEnum):
+    """soxr quality presets, from cheapest to most accurate."""
+
+    QUICK = "QQ"
+    LOW = "LQ"
+    MEDIUM = "MQ"
+    HIGH = "HQ"
+    VERY_HIGH = "VHQ"
+
+
+class StreamResampler:
+    """Converts a stream of 16-bit PCM chunks from one sample rate to another.
+
+    A single soxr.ResampleStream is kept for the life of the stream, so the
+    filter is only set up once and its state carries across chunk boundaries.
+    """
+
+    def __init__(
+        self,
+        in_rate: int,
+        out_rate: int,
+        num_channels: int = 1,
+        quality: ResampleQuality = ResampleQuality.MEDIUM,
+    ):
+        self._in_rate = in_rate
+        self._out_rate = out_rate
+        self._num_channels = num_channels
+        self._stream = None
+        if in_rate != out_rate:
+            self._stream = soxr.ResampleStream(
+                in_rate, out_rate, num_channels, dtype="int16", quality=quality
+            )
+
+    @property
+    def in_rate(self) -> int:
+        return self._in_rate
+
+    @property
+    def out_rate(self) -> int:
+        return self._out_rate
+
+    def process(self, data: audio_base.AudioData) -> audio_base.AudioData:
+        """Resamples a chunk. May return fewer samples than expected while the filter fills."""
+        if self._stream is None:
+            return data
+        samples = np.frombuffer(data, dtype=np.int16)
+        if self._num_channels > 1:
+            samples = samples.reshape(-1, self._num_channels)
+        return audio_base.byte_view(self._stream.resample_chunk(samples))
+
+    def flush(self) -> audio_base.AudioData:
+        """Returns the samples still held in the filter at the end of the stream."""
+        if self._stream is None:
+            return b""
+        shape = (0, self._num_channels) if self._num_channels > 1 else (0,)
+        empty = np.zeros(shape, dtype=np.int16)
+        tail = audio_base.byte_view(self._stream.resample_chunk(empty, last=True))
+        self._stream.clear()
+        return tail
+
+
+class ResamplingAudioSink(audio_base.AudioSink):
+    """AudioSink that converts audio to a fixed sample rate before writing it to another sink."""
+
+    def __init__(
+        self,
+        sink: audio_base.AudioSink,
+        sample_rate: int,
+        quality: ResampleQuality = ResampleQuality.MEDIUM,
+    ):
+        super().__init__()
+        self._sink = sink
+        self._sample_rate = sample_rate
+        self._quality = quality
+        self._resampler: Optional[StreamResampler] = None
+
+    @property
+    def sink(self) -> audio_base.AudioSink:
+        return self._sink
+
+    async def start(self, sample_rate: int, num_channels: int):
+        self._resampler = StreamResampler(
+            sample_rate, self._sample_rate, num_channels, self._quality
+        )
+        await self._sink.start(self._sample_rate, num_channels)
+
+    async def write(self, data: audio_base.AudioData):
+        assert self._resampler is not None
+        resampled = self._resampler.process(data)
+        if resampled:
+            await self._sink.write(resampled)
+
+    async def clear(self):
+        if self._resampler:
+            self._resampler.flush()
+        await self._sink.clear()
+
+    async def close(self):
+        if self._resampler:
+            tail = self._resampler.flush()
+            if tail:
+                await self._sink.write(tail)
+            self._resampler = None
+        await self._sink.close()
+
+
+class ResamplingAudioSource(audio_base.AudioSource):
+    """AudioSource that converts the audio from another source to a fixed sample rate."""
+
+    def __init__(
+        self,
+        source: audio_base.AudioSource,
+        sample_rate: int,
+        quality: ResampleQuality = ResampleQuality.MEDIUM,
+    ):
+        super().__init__(sample_rate, source.num_channels)
+        self._source = source
+        self._quality = quality
+
+    @property
+    def source(self) -> audio_base.AudioSource:
+        return self._source
+
+    @property
+    def enabled(self) -> bool:
+        return self._source.enabled
+
+    @enabled.setter
+    def enabled(self, enabled: bool):
+        self._source.enabled = enabled
+
+    async def stream(self) -> AsyncGenerator[audio_base.AudioData, None]:
+        resampler = StreamResampler(
+            self._source.sample_rate,
+            self._sample_rate,
+            self._num_channels,
+            self._quality,
+        )
+        async for chunk in self._source.stream():
+            resampled = resampler.process(chunk)
+            if resampled:
+                yield resampled
+        tail = resampler.flush()
+        if tail:
+            yield tail
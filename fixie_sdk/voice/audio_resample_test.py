@@ -0,0 +1,69 @@
+import numpy as np
+import pytest
+
+from fixie_sdk.voice import audio_base
+from fixie_sdk.voice import audio_resample
+
+
+class RecordingSink(audio_base.AudioSink):
+    def __init__(self):
+        self.sample_rate = 0
+        self.chunks = []
+        self.closed = False
+
+    async def start(self, sample_rate: int, num_channels: int):
+        self.sample_rate = sample_rate
+
+    async def write(self, data: bytes):
+        self.chunks.append(data)
+
+    async def close(self):
+        self.closed = True
+
+
+def _tone(num_samples: int, sample_rate: int) -> np.ndarray:
+    t = np.arange(num_samples) / sample_rate
+    return (np.sin(2 * np.pi * 440 * t) * 10000).astype(np.int16)
+
+
+def test_stream_resampler_keeps_sample_count():
+    resampler = audio_resample.StreamResampler(48000, 8000)
+    tone = _tone(48000, 48000)
+    out = b"".join(
+        resampler.process(chunk.tobytes()) for chunk in tone.reshape(-1, 480)
+    )
+    out += resampler.flush()
+    assert len(out) // 2 == 8000
+
+
+def test_stream_resampler_matches_one_shot():
+    tone = _tone(4800, 48000)
+    chunked = audio_resample.StreamResampler(48000, 16000)
+    out = b"".join(chunked.process(chunk.tobytes()) for chunk in tone.reshape(-1, 480))
+    out += chunked.flush()
+    whole = audio_resample.StreamResampler(48000, 16000)
+    expected = b"".join([whole.process(tone.tobytes()), whole.flush()])
+    assert len(out) == len(expected)
+    diff = np.frombuffer(out, np.int16).astype(int) - np.frombuffer(expected, np.int16)
+    assert np.abs(diff).max() <= 2
+
+
+def test_stream_resampler_passthrough():
+    resampler = audio_resample.StreamResampler(8000, 8000)
+    assert resampler.process(b"\x01\x02") == b"\x01\x02"
+    assert resampler.flush() == b""
+
+
+@pytest.mark.asyncio
+async def test_resampling_sink():
+    inner = RecordingSink()
+    sink = audio_resample.ResamplingAudioSink(
+        inner, 8000, audio_resample.ResampleQuality.QUICK
+    )
+    await sink.start(48000, 1)
+    assert inner.sample_rate == 8000
+    for chunk in _tone(9600, 48000).reshape(-1, 480):
+        await sink.write(chunk.tobytes())
+    await sink.close()
+    assert inner.closed
+    assert sum(len(chunk) for chunk in inner.chunks) // 2 == 1600
@@ -2,8 +2,23 @@ import asyncio
 from typing import AsyncGenerator, Optional
 
 from livekit import rtc
+from pyee import asyncio as pyee_asyncio
 
 from fixie_sdk.voice import audio_base
+from fixie_sdk.voice import audio_buffer
+from fixie_sdk.voice import audio_jitter
+from fixie_sdk.voice import audio_queue
+from fixie_sdk.voice import audio_vad
+
+# Frame duration assumed for playout before the first frame has been received.
+DEFAULT_FRAME_MS = 10
+# How far ahead of real time we'll send audio from sources that produce it faster.
+MAX_SEND_LEAD_MS = 100
+# While DTX is suppressing silence, a silent frame is still sent this often so
+# that the track and the server's view of the stream stay alive.
+DTX_KEEPALIVE_MS = 400
+# How long the caller must keep talking over the agent before we interrupt it.
+DEFAULT_BARGE_IN_MS = 150
 
 
 class AudioSinkToSendTrack(audio_base.AudioSink):
@@ -36,9 +51,11 @@ class AudioSinkToSendTrack(audio_base.AudioSink):
         self._source = rtc.AudioSource(sample_rate, num_channels)
         self._track = rtc.LocalAudioTrack.create_audio_track("output", self._source)
 
-    async def write(self, data: bytes):
+    async def write(self, data: audio_base.AudioData):
         assert self._source is not None
-        samples_per_channel = len(data) // (self._num_channels * 2)
+        samples_per_channel = audio_base.byte_view(data).nbytes // (
+            self._num_channels * 2
+        )
         frame = rtc.AudioFrame(
             data, self._sample_rate, self._num_channels, samples_per_channel
         )
@@ -49,25 +66,108 @@ class AudioSinkToSendTrack(audio_base.AudioSink):
 
 
 class AudioSourceFromRecvTrack(audio_base.AudioSource):
-    """AudioSource that owns and reads from a LiveKit audio track."""
+    """AudioSource that owns and reads from a LiveKit audio track.
+
+    Frames are read from the track as they arrive and queued for the
+    consumer, with at most `max_ms` of audio held; if the consumer falls
+    further behind than that, the oldest audio is dropped.
+    """
 
-    def __init__(self, track: rtc.Track):
+    def __init__(
+        self,
+        track: rtc.Track,
+        max_ms: float = audio_queue.DEFAULT_MAX_MS,
+        policy: audio_queue.OverflowPolicy = audio_queue.OverflowPolicy.DROP_OLDEST,
+    ):
         super().__init__()
         self._stream = rtc.AudioStream(track)
+        self._queue = audio_queue.AudioQueue(max_ms=max_ms, policy=policy)
+
+    @property
+    def queue_stats(self) -> audio_queue.AudioQueueStats:
+        return self._queue.stats
+
+    async def stream(self) -> AsyncGenerator[audio_base.AudioData, None]:
+        task = asyncio.create_task(self._receive())
+        try:
+            async for buf in self._queue:
+                yield buf if self.enabled else audio_base.silence(len(buf))
+        finally:
+            task.cancel()
 
-    async def stream(self) -> AsyncGenerator[bytes, None]:
+    async def _receive(self):
+        sample_rate = num_channels = 0
         async for frame in self._stream:
-            buf = frame.data.tobytes()
-            yield buf if self.enabled else b"\x00" * len(buf)
+            if (frame.sample_rate, frame.num_channels) != (sample_rate, num_channels):
+                sample_rate, num_channels = frame.sample_rate, frame.num_channels
+                self._queue.set_format(sample_rate, num_channels)
+            # Each frame owns its buffer, so we can hand out a view of it.
+            self._queue.put_nowait(frame.data.cast("B"))
+        self._queue.close()
 
 
-class AudioSourceToSendTrackAdapter:
-    """Adapter than takes in an AudioSource and writes from it to a LiveKit audio track."""
+class AudioSourceToSendTrackAdapter(pyee_asyncio.AsyncIOEventEmitter):
+    """Adapter than takes in an AudioSource and writes from it to a LiveKit audio track.
 
-    def __init__(self, source: audio_base.AudioSource):
+    Whatever size of chunk the source yields is re-chunked into frames of
+    `frame_ms`, and sends are paced so that we never get more than
+    MAX_SEND_LEAD_MS ahead of real time (e.g., when reading from a file).
+    The time the last audible frame was sent is kept in `last_speech_time`.
+
+    With `dtx` enabled, frames that the voice activity detector classifies as
+    silence (including everything while the source is disabled) aren't sent,
+    apart from a silent keepalive frame every DTX_KEEPALIVE_MS.
+
+    While `muted`, silence is sent in place of the source's audio, but the
+    audio is still analyzed: if `barge_in_dbfs` is set and the level stays
+    above it for `barge_in_ms`, "barge_in" is emitted (once per mute) with the
+    event loop time at which the speech started.
+    """
+
+    def __init__(
+        self,
+        source: audio_base.AudioSource,
+        frame_ms: int = 10,
+        dtx: bool = False,
+        barge_in_dbfs: Optional[float] = None,
+        barge_in_ms: int = DEFAULT_BARGE_IN_MS,
+    ):
+        super().__init__()
         self._source = source
-        self._rtc_source = rtc.AudioSource(source.sample_rate, source.num_channels)
+        self._rtc_source: Optional[rtc.AudioSource] = None
+        self._track: Optional[rtc.LocalAudioTrack] = None
+        self._frame_ms = frame_ms
+        self._dtx = dtx
         self._task: Optional[asyncio.Task] = None
+        self._vad = audio_vad.VoiceActivityDetector()
+        self._last_speech_time: Optional[float] = None
+        self._frames_sent = 0
+        self._frames_suppressed = 0
+        self._muted = False
+        self._barge_in_detector: Optional[audio_vad.EnergyDetector] = None
+        if barge_in_dbfs is not None:
+            self._barge_in_detector = audio_vad.EnergyDetector(barge_in_dbfs)
+        self._barge_in_ms = barge_in_ms
+        self._barge_in_onset: Optional[float] = None
+        self._barge_in_run_ms = 0
+        self._barge_in_emitted = False
+
+    @property
+    def source(self) -> audio_base.AudioSource:
+        return self._source
+
+    @source.setter
+    def source(self, source: audio_base.AudioSource):
+        """Replaces the source. Must be called before start()."""
+        if self._task:
+            raise RuntimeError("Can't replace the source of a running adapter")
+        if (source.sample_rate, source.num_channels) != (
+            self._source.sample_rate,
+            self._source.num_channels,
+        ):
+            self._rtc_source = None
+            self._track = None
+        self._source = source
 
     @property
     def enabled(self):
@@ -77,14 +177,49 @@ class AudioSourceToSendTrackAdapter:
     def enabled(self, value):
         self._source.enabled = value
 
+    @property
+    def muted(self) -> bool:
+        return self._muted
+
+    @muted.setter
+    def muted(self, muted: bool):
+        self._muted = muted
+        self._barge_in_onset = None
+        self._barge_in_run_ms = 0
+        self._barge_in_emitted = False
+
     @property
     def track(self):
         if not self._track:
             raise Exception("track not initialized")
         return self._track
 
+    @property
+    def frames_sent(self) -> int:
+        return self._frames_sent
+
+    @property
+    def frames_suppressed(self) -> int:
+        """Number of silent frames that DTX didn't send."""
+        return self._frames_suppressed
+
+    @property
+    def last_speech_time(self) -> Optional[float]:
+        """Event loop time at which the most recent audible frame was sent."""
+        return self._last_speech_time
+
+    def prepare(self):
+        """Creates the LiveKit audio source and track, if that hasn't been done yet."""
+        if not self._track:
+            self._rtc_source = rtc.AudioSource(
+                self._source.sample_rate, self._source.num_channels
+            )
+            self._track = rtc.LocalAudioTrack.create_audio_track(
+                "input", self._rtc_source
+            )
+
     async def start(self):
-        self._track = rtc.LocalAudioTrack.create_audio_track("input", self._rtc_source)
+        self.prepare()
         self._task = asyncio.create_task(self._pump())
 
     async def close(self):
@@ -93,36 +228,167 @@ class AudioSourceToSendTrackAdapter:
             self._task = None
 
     async def _pump(self):
+        chunker = audio_buffer.FrameChunker(
+            self._source.sample_rate, self._source.num_channels, self._frame_ms
+        )
+        loop = asyncio.get_running_loop()
+        next_time = loop.time()
+        suppressed_ms = 0
         async for chunk in self._source.stream():
-            frame = rtc.AudioFrame(
-                chunk,
-                self._source.sample_rate,
-                self._source.num_channels,
-                len(chunk) // (self._source.num_channels * 2),
-            )
-            await self._rtc_source.capture_frame(frame)
+            for data in chunker.push(chunk):
+                if self._muted:
+                    self._check_barge_in(data, loop.time())
+                    data = audio_base.silence(len(data))
+                active = self._vad.process(data, self._frame_ms)
+                if active or not self._dtx:
+                    await self._capture(data, chunker)
+                    suppressed_ms = 0
+                elif suppressed_ms + self._frame_ms >= DTX_KEEPALIVE_MS:
+                    await self._capture(audio_base.silence(len(data)), chunker)
+                    suppressed_ms = 0
+                else:
+                    suppressed_ms += self._frame_ms
+                    self._frames_suppressed += 1
+                now = loop.time()
+                if self._vad.speech:
+                    self._last_speech_time = now
+                next_time = max(next_time, now) + self._frame_ms / 1000
+                lead = next_time - now - MAX_SEND_LEAD_MS / 1000
+                if lead > 0:
+                    await asyncio.sleep(lead)
+        data = chunker.flush()
+        if data:
+            await self._capture(data, chunker)
+
+    def _check_barge_in(self, data: audio_base.AudioData, now: float):
+        if self._barge_in_detector is None or self._barge_in_emitted:
+            return
+        if not self._barge_in_detector.is_active(data):
+            self._barge_in_onset = None
+            self._barge_in_run_ms = 0
+            return
+        if self._barge_in_onset is None:
+            self._barge_in_onset = now
+        self._barge_in_run_ms += self._frame_ms
+        if self._barge_in_run_ms >= self._barge_in_ms:
+            self._barge_in_emitted = True
+            self.emit("barge_in", self._barge_in_onset)
+
+    async def _capture(
+        self, data: audio_base.AudioData, chunker: audio_buffer.FrameChunker
+    ):
+        assert self._rtc_source is not None
+        frame = rtc.AudioFrame(
+            data,
+            self._source.sample_rate,
+            self._source.num_channels,
+            chunker.samples_per_channel,
+        )
+        await self._rtc_source.capture_frame(frame)
+        self._frames_sent += 1
+
 
+class AudioSinkFromRecvTrackAdapter(pyee_asyncio.AsyncIOEventEmitter):
+    """Adapter that takes in a LiveKit audio track and reads from it to an AudioSink (e.g., a speaker).
 
-class AudioSinkFromRecvTrackAdapter:
-    """Adapter that takes in a LiveKit audio track and reads from it to an AudioSink (e.g., a speaker)."""
+    If a JitterBuffer is provided, received frames are buffered and written to
+    the sink on a steady clock rather than as soon as they arrive.
+    Emits "first_frame" when the first frame has been written to the sink,
+    and "audio_start" with the event loop time when the first audible frame
+    is written after a call to watch_for_audio(). After interrupt(), received
+    audio is discarded until resume() is called.
+    """
 
-    def __init__(self, sink: audio_base.AudioSink, track: rtc.Track):
+    def __init__(
+        self,
+        sink: audio_base.AudioSink,
+        track: rtc.Track,
+        jitter_buffer: Optional[audio_jitter.JitterBuffer] = None,
+    ):
         super().__init__()
         self._track = track
         self._stream = rtc.AudioStream(track=track)
         self._sink = sink
+        self._jitter_buffer = jitter_buffer
         self._task: Optional[asyncio.Task] = None
+        self._playout_task: Optional[asyncio.Task] = None
+        self._first_frame_written = False
+        self._detector = audio_vad.EnergyDetector()
+        self._watching = False
+        self._interrupted = False
+
+    @property
+    def jitter_buffer(self) -> Optional[audio_jitter.JitterBuffer]:
+        return self._jitter_buffer
+
+    def watch_for_audio(self):
+        """Emits "audio_start" the next time an audible frame is written to the sink."""
+        self._watching = True
+
+    async def interrupt(self):
+        """Stops playing immediately, discarding buffered audio and any that arrives until resume()."""
+        self._interrupted = True
+        if self._jitter_buffer:
+            self._jitter_buffer.clear()
+        await self._sink.clear()
+
+    def resume(self):
+        self._interrupted = False
+
+    async def set_sink(self, sink: audio_base.AudioSink):
+        """Switches output to a new sink and closes the old one."""
+        await sink.start(48000, 1)
+        old_sink, self._sink = self._sink, sink
+        await old_sink.close()
 
     async def start(self):
         await self._sink.start(48000, 1)  # ?
-        self._task = asyncio.create_task(self._pump())
+        if self._jitter_buffer:
+            self._task = asyncio.create_task(self._receive())
+            self._playout_task = asyncio.create_task(self._playout())
+        else:
+            self._task = asyncio.create_task(self._pump())
 
     async def close(self):
         if self._task:
             self._task.cancel()
             self._task = None
+        if self._playout_task:
+            self._playout_task.cancel()
+            self._playout_task = None
         await self._sink.close()
 
     async def _pump(self):
-        async for chunk in self._stream:
-            await self._sink.write(chunk.data.tobytes())
+        async for frame in self._stream:
+            await self._write(frame.data.cast("B"))
+
+    async def _receive(self):
+        assert self._jitter_buffer is not None
+        loop = asyncio.get_running_loop()
+        async for frame in self._stream:
+            duration_ms = frame.samples_per_channel * 1000 / frame.sample_rate
+            self._jitter_buffer.push(frame.data.cast("B"), duration_ms, loop.time())
+
+    async def _playout(self):
+        assert self._jitter_buffer is not None
+        loop = asyncio.get_running_loop()
+        next_time = loop.time()
+        while True:
+            frame = self._jitter_buffer.pop()
+            if frame is not None:
+                await self._write(frame)
+            # Schedule against an absolute clock so that timing errors don't accumulate.
+            frame_ms = self._jitter_buffer.frame_ms or DEFAULT_FRAME_MS
+            next_time = max(next_time + frame_ms / 1000, loop.time() - frame_ms / 1000)
+            await asyncio.sleep(next_time - loop.time())
+
+    async def _write(self, data: audio_base.AudioData):
+        if self._interrupted:
+            return
+        await self._sink.write(data)
+        if self._watching and self._detector.is_active(data):
+            self._watching = False
+            self.emit("audio_start", asyncio.get_running_loop().time())
+        if not self._first_frame_written:
+            self._first_frame_written = True
+            self.emit("first_frame")
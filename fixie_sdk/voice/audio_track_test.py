@@ -0,0 +1,247 @@
+import asyncio
+
+import numpy as np
+import pytest
+from livekit import rtc
+
+from fixie_sdk.voice import audio_base
+from fixie_sdk.voice import audio_jitter
+from fixie_sdk.voice import audio_track
+from fixie_sdk.voice import audio_vad
+
+
+class RecordingSink(audio_base.AudioSink):
+    def __init__(self):
+        self.chunks = []
+
+    async def start(self, sample_rate: int, num_channels: int):
+        pass
+
+    async def write(self, data: bytes):
+        self.chunks.append(bytes(data))
+
+    async def close(self):
+        pass
+
+
+class FakeAudioStream:
+    def __init__(self, frames):
+        self._frames = frames
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for frame in self._frames:
+            yield frame
+            await asyncio.sleep(0)
+
+
+def _frame(value: int, samples: int = 480) -> rtc.AudioFrame:
+    data = np.full(samples, value, dtype=np.int16).tobytes()
+    return rtc.AudioFrame(data, 48000, 1, samples)
+
+
+@pytest.fixture
+def frames(monkeypatch):
+    frames = []
+    monkeypatch.setattr(
+        audio_track.rtc, "AudioStream", lambda track: FakeAudioStream(frames)
+    )
+    return frames
+
+
+@pytest.mark.asyncio
+async def test_sink_adapter_forwards_frames(frames):
+    frames.extend([_frame(1), _frame(2)])
+    sink = RecordingSink()
+    adapter = audio_track.AudioSinkFromRecvTrackAdapter(sink, None)
+    first_frames = []
+    adapter.on("first_frame", lambda: first_frames.append(len(sink.chunks)))
+    await adapter.start()
+    await asyncio.sleep(0.01)
+    await adapter.close()
+    assert [chunk[:2] for chunk in sink.chunks] == [b"\x01\x00", b"\x02\x00"]
+    assert first_frames == [1]
+
+
+@pytest.mark.asyncio
+async def test_sink_adapter_with_jitter_buffer(frames):
+    frames.extend([_frame(i + 1) for i in range(3)])
+    sink = RecordingSink()
+    jitter_buffer = audio_jitter.JitterBuffer(min_ms=20)
+    adapter = audio_track.AudioSinkFromRecvTrackAdapter(sink, None, jitter_buffer)
+    await adapter.start()
+    await asyncio.sleep(0.1)
+    await adapter.close()
+    played = [chunk[:2] for chunk in sink.chunks[:3]]
+    assert played == [b"\x01\x00", b"\x02\x00", b"\x03\x00"]
+    assert jitter_buffer.stats.frames_played == 3
+    assert jitter_buffer.stats.frames_concealed > 0
+
+
+@pytest.mark.asyncio
+async def test_source_from_recv_track_does_not_copy(frames):
+    frame = _frame(5)
+    frames.append(frame)
+    frames.append(_frame(6))
+    source = audio_track.AudioSourceFromRecvTrack(None)
+    stream = source.stream()
+    chunk = await stream.__anext__()
+    assert isinstance(chunk, memoryview)
+    assert chunk.obj is frame.data.obj
+    source.enabled = False
+    chunk = await stream.__anext__()
+    assert chunk is audio_base.silence(960)
+
+
+class FakeRtcSource:
+    def __init__(self, sample_rate: int, num_channels: int):
+        self.frames: list[rtc.AudioFrame] = []
+
+    async def capture_frame(self, frame: rtc.AudioFrame):
+        self.frames.append(frame)
+
+
+class ChunkSource(audio_base.AudioSource):
+    def __init__(self, chunks, sample_rate=8000):
+        super().__init__(sample_rate, 1)
+        self._chunks = chunks
+
+    async def stream(self):
+        for chunk in self._chunks:
+            yield chunk
+
+
+@pytest.mark.asyncio
+async def test_source_adapter_rechunks(monkeypatch):
+    monkeypatch.setattr(audio_track.rtc, "AudioSource", FakeRtcSource)
+    monkeypatch.setattr(
+        audio_track.rtc.LocalAudioTrack, "create_audio_track", lambda name, source: 1
+    )
+    # 20 ms, 25 ms and 1 s chunks at 8 kHz.
+    chunks = [bytes(320), bytes(400), bytes(16000)]
+    adapter = audio_track.AudioSourceToSendTrackAdapter(ChunkSource(chunks))
+    adapter.prepare()
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    await adapter._pump()
+    elapsed = loop.time() - start
+    frames = adapter._rtc_source.frames
+    assert len(frames) == 105
+    assert all(frame.samples_per_channel == 80 for frame in frames)
+    # The 1 s chunk was paced out at real time, less the allowed lead.
+    assert elapsed > 0.9
+
+
+@pytest.mark.asyncio
+async def test_source_adapter_records_last_speech(monkeypatch):
+    monkeypatch.setattr(audio_track.rtc, "AudioSource", FakeRtcSource)
+    monkeypatch.setattr(
+        audio_track.rtc.LocalAudioTrack, "create_audio_track", lambda name, source: 1
+    )
+    speech = np.full(80, 3000, dtype=np.int16).tobytes()
+    adapter = audio_track.AudioSourceToSendTrackAdapter(
+        ChunkSource([bytes(160), speech, bytes(160)])
+    )
+    assert adapter.last_speech_time is None
+    adapter.prepare()
+    before = asyncio.get_running_loop().time()
+    await adapter._pump()
+    assert adapter.last_speech_time is not None
+    assert adapter.last_speech_time >= before
+
+
+@pytest.mark.asyncio
+async def test_sink_adapter_reports_audio_start(frames):
+    frames.extend([_frame(0), _frame(0), _frame(3000), _frame(3000)])
+    sink = RecordingSink()
+    adapter = audio_track.AudioSinkFromRecvTrackAdapter(sink, None)
+    starts = []
+    adapter.on("audio_start", lambda time: starts.append(len(sink.chunks)))
+    adapter.watch_for_audio()
+    await adapter.start()
+    await asyncio.sleep(0.01)
+    await adapter.close()
+    assert starts == [3]
+
+
+@pytest.mark.asyncio
+async def test_source_adapter_dtx_suppresses_silence(monkeypatch):
+    monkeypatch.setattr(audio_track.rtc, "AudioSource", FakeRtcSource)
+    monkeypatch.setattr(
+        audio_track.rtc.LocalAudioTrack, "create_audio_track", lambda name, source: 1
+    )
+    speech = np.full(80, 3000, dtype=np.int16).tobytes()
+    # 100 ms of speech followed by 1 s of silence at 8 kHz.
+    adapter = audio_track.AudioSourceToSendTrackAdapter(
+        ChunkSource([speech * 10, bytes(16000)]), dtx=True
+    )
+    adapter.prepare()
+    await adapter._pump()
+    # The speech, the VAD hangover, and a keepalive during the remaining ~700 ms.
+    hangover_frames = int(audio_vad.DEFAULT_HANGOVER_MS // 10) - 1
+    assert adapter.frames_sent == 10 + hangover_frames + 1
+    assert adapter.frames_sent + adapter.frames_suppressed == 110
+    assert len(adapter._rtc_source.frames) == adapter.frames_sent
+
+
+@pytest.mark.asyncio
+async def test_source_adapter_barge_in(monkeypatch):
+    monkeypatch.setattr(audio_track.rtc, "AudioSource", FakeRtcSource)
+    monkeypatch.setattr(
+        audio_track.rtc.LocalAudioTrack, "create_audio_track", lambda name, source: 1
+    )
+    speech = np.full(80, 3000, dtype=np.int16).tobytes()
+    # A short blip that shouldn't trigger, then sustained speech.
+    chunks = [speech * 5, bytes(160), speech * 30]
+    adapter = audio_track.AudioSourceToSendTrackAdapter(
+        ChunkSource(chunks), barge_in_dbfs=-35, barge_in_ms=100
+    )
+    barge_ins = []
+    adapter.on("barge_in", barge_ins.append)
+    adapter.prepare()
+    adapter.muted = True
+    await adapter._pump()
+    await asyncio.sleep(0)
+    assert len(barge_ins) == 1
+    # Nothing but silence was sent while muted.
+    assert all(not any(frame.data) for frame in adapter._rtc_source.frames)
+
+
+@pytest.mark.asyncio
+async def test_sink_adapter_interrupt(frames):
+    class ClearingSink(RecordingSink):
+        cleared = 0
+
+        async def clear(self):
+            self.cleared += 1
+
+    frames.extend([_frame(1), _frame(2)])
+    sink = ClearingSink()
+    adapter = audio_track.AudioSinkFromRecvTrackAdapter(sink, None)
+    await adapter.interrupt()
+    await adapter.start()
+    await asyncio.sleep(0.01)
+    assert sink.cleared == 1
+    assert sink.chunks == []
+
+    adapter.resume()
+    frames.append(_frame(3))
+    await adapter._pump()
+    await adapter.close()
+    assert sink.chunks[-1][:2] == b"\x03\x00"
+
+
+@pytest.mark.asyncio
+async def test_source_from_recv_track_bounds_latency(frames):
+    frames.extend([_frame(i) for i in range(10)])
+    source = audio_track.AudioSourceFromRecvTrack(None, max_ms=30)
+    stream = source.stream()
+    first = await stream.__anext__()
+    # The consumer falls behind while the remaining frames arrive.
+    await asyncio.sleep(0.02)
+    rest = [await stream.__anext__() for _ in range(3)]
+    assert [chunk[0] for chunk in [first] + rest] == [0, 7, 8, 9]
+    assert source.queue_stats.chunks_dropped == 6
+    await stream.aclose()
@@ -0,0 +1,86 @@
+import math
+
+import numpy as np
+
+# Level above which a frame is considered to contain speech (or other audible output).
+DEFAULT_THRESHOLD_DBFS = -45.0
+# How long voice activity is held after the level drops below the threshold.
+DEFAULT_HANGOVER_MS = 300.0
+# Full scale for 16-bit PCM.
+_FULL_SCALE = 32768.0
+
+
+def mean_square(data) -> float:
+    """Mean of the squared 16-bit samples in `data`."""
+    samples = np.frombuffer(data, dtype=np.int16).astype(np.float32)
+    if not len(samples):
+        return 0.0
+    return float(np.dot(samples, samples)) / len(samples)
+
+
+def rms_dbfs(data) -> float:
+    """RMS level of 16-bit PCM, in dB relative to full scale (-inf for silence)."""
+    power = mean_square(data)
+    if power <= 0:
+        return -math.inf
+    return 10 * math.log10(power / _FULL_SCALE**2)
+
+
+def dbfs_to_mean_square(dbfs: float) -> float:
+    """Converts a level in dBFS to the equivalent mean_square() value."""
+    return _FULL_SCALE**2 * 10 ** (dbfs / 10)
+
+
+class EnergyDetector:
+    """Decides whether frames of 16-bit PCM are audible by comparing their RMS to a threshold.
+
+    The threshold is converted once up front, so each frame costs one dot
+    product and no logarithms.
+    """
+
+    def __init__(self, threshold_dbfs: float = DEFAULT_THRESHOLD_DBFS):
+        self._threshold = dbfs_to_mean_square(threshold_dbfs)
+
+    def is_active(self, data) -> bool:
+        return mean_square(data) > self._threshold
+
+
+class VoiceActivityDetector:
+    """Energy-based voice activity detector with hangover, for frames of 16-bit PCM.
+
+    After the level drops below the threshold, frames are still reported as
+    active for `hangover_ms`, so that word endings and short pauses between
+    words aren't cut off.
+    """
+
+    def __init__(
+        self,
+        threshold_dbfs: float = DEFAULT_THRESHOLD_DBFS,
+        hangover_ms: float = DEFAULT_HANGOVER_MS,
+    ):
+        self._detector = EnergyDetector(threshold_dbfs)
+        self._hangover_ms = hangover_ms
+        self._remaining_ms = 0.0
+        self._speech = False
+
+    @property
+    def speech(self) -> bool:
+        """Whether the last frame was itself above the threshold, ignoring hangover."""
+        return self._speech
+
+    @property
+    def active(self) -> bool:
+        return self._speech or self._remaining_ms > 0
+
+    def process(self, frame, duration_ms: float) -> bool:
+        """Classifies the next frame and returns whether it should be treated as voice."""
+        self._speech = self._detector.is_active(frame)
+        if self._speech:
+            self._remaining_ms = self._hangover_ms
+        else:
+            self._remaining_ms = max(0.0, self._remaining_ms - duration_ms)
+        return self.active
+
+    def reset(self):
+        self._remaining_ms = 0.0
+        self._speech = False
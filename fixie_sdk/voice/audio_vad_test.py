@@ -0,0 +1,35 @@
+import math
+
+import numpy as np
+import pytest
+
+from fixie_sdk.voice import audio_vad
+
+
+def test_rms_dbfs():
+    assert audio_vad.rms_dbfs(bytes(320)) == -math.inf
+    full_scale = np.full(160, -32768, dtype=np.int16).tobytes()
+    assert audio_vad.rms_dbfs(full_scale) == pytest.approx(0)
+    half_scale = np.full(160, 16384, dtype=np.int16).tobytes()
+    assert audio_vad.rms_dbfs(half_scale) == pytest.approx(-6.02, abs=0.01)
+
+
+def test_energy_detector():
+    detector = audio_vad.EnergyDetector(threshold_dbfs=-40)
+    quiet = np.full(160, 100, dtype=np.int16).tobytes()  # about -50 dBFS
+    loud = np.full(160, 1000, dtype=np.int16).tobytes()  # about -30 dBFS
+    assert not detector.is_active(quiet)
+    assert detector.is_active(loud)
+    assert not detector.is_active(b"")
+
+
+def test_voice_activity_detector_hangover():
+    vad = audio_vad.VoiceActivityDetector(threshold_dbfs=-40, hangover_ms=30)
+    loud = np.full(160, 1000, dtype=np.int16).tobytes()
+    silent = bytes(320)
+    assert not vad.process(silent, 10)
+    assert vad.process(loud, 10)
+    assert vad.speech
+    results = [vad.process(silent, 10) for _ in range(4)]
+    assert results == [True, True, False, False]
+    assert not vad.speech
@@ -0,0 +1,155 @@
+"""JSON encoders and decoders for dataclasses, compiled once per class.
+
+DataClassJsonMixin inspects a class's fields and type hints on every
+to_dict/from_dict call. The functions here do that work once, generate a plain
+Python function that reads or writes each field directly, and cache it.
+
+If orjson is installed, it is used for parsing and serialization.
+"""
+import dataclasses
+import enum
+import json
+import typing
+from types import UnionType
+from typing import Any, Callable, Optional
+
+try:
+    import orjson
+
+    orjson_imported = True
+except ImportError:
+    orjson_imported = False
+
+Encoder = Callable[[Any], dict[str, Any]]
+Decoder = Callable[[dict[str, Any]], Any]
+
+_encoders: dict[type, Encoder] = {}
+_decoders: dict[type, Decoder] = {}
+
+
+def camel_case(name: str) -> str:
+    """Converts a snake_case field name into a camelCase JSON key."""
+    first, *rest = name.split("_")
+    return first + "".join(part.capitalize() for part in rest)
+
+
+def loads(data: str | bytes) -> Any:
+    if orjson_imported:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def dumps(obj: Any) -> str:
+    if orjson_imported:
+        return orjson.dumps(obj).decode()
+    return json.dumps(obj)
+
+
+def get_encoder(cls: type) -> Encoder:
+    """Returns a function that converts an instance of `cls` into a JSON-ready dict."""
+    encoder = _encoders.get(cls)
+    if encoder is None:
+        encoder = _encoders[cls] = _compile_encoder(cls)
+    return encoder
+
+
+def get_decoder(cls: type) -> Decoder:
+    """Returns a function that builds an instance of `cls` from a parsed JSON dict."""
+    decoder = _decoders.get(cls)
+    if decoder is None:
+        decoder = _decoders[cls] = _compile_decoder(cls)
+    return decoder
+
+
+def _json_key(cls: type, name: str) -> str:
+    # Classes that use DataClassJsonMixin declare their key format in
+    # dataclass_json_config; plain dataclasses use the field names as-is.
+    config = getattr(cls, "dataclass_json_config", None) or {}
+    return camel_case(name) if config.get("letter_case") else name
+
+
+def _unwrap_optional(hint: Any) -> tuple[Any, bool]:
+    if typing.get_origin(hint) in (typing.Union, UnionType):
+        args = [arg for arg in typing.get_args(hint) if arg is not type(None)]
+        if len(args) == 1:
+            return args[0], True
+    return hint, False
+
+
+def _value_encoder(hint: Any) -> Optional[Callable[[Any], Any]]:
+    hint, optional = _unwrap_optional(hint)
+    convert: Optional[Callable[[Any], Any]] = None
+    if isinstance(hint, type) and issubclass(hint, enum.Enum):
+        convert = _enum_value
+    elif dataclasses.is_dataclass(hint):
+        convert = get_encoder(typing.cast(type, hint))
+    if convert is not None and optional:
+        return _none_or(convert)
+    return convert
+
+
+def _value_decoder(hint: Any) -> Optional[Callable[[Any], Any]]:
+    hint, optional = _unwrap_optional(hint)
+    convert: Optional[Callable[[Any], Any]] = None
+    if isinstance(hint, type) and issubclass(hint, enum.Enum):
+        convert = hint
+    elif dataclasses.is_dataclass(hint):
+        convert = get_decoder(typing.cast(type, hint))
+    if convert is not None and optional:
+        return _none_or(convert)
+    return convert
+
+
+def _enum_value(value: enum.Enum) -> Any:
+    return value.value
+
+
+def _none_or(convert: Callable[[Any], Any]) -> Callable[[Any], Any]:
+    def convert_optional(value):
+        return None if value is None else convert(value)
+
+    return convert_optional
+
+
+def _compile_encoder(cls: type) -> Encoder:
+    hints = typing.get_type_hints(cls)
+    namespace: dict[str, Any] = {}
+    items = []
+    for field in dataclasses.fields(cls):
+        value = f"obj.{field.name}"
+        convert = _value_encoder(hints[field.name])
+        if convert is not None:
+            namespace[f"_encode_{field.name}"] = convert
+            value = f"_encode_{field.name}({value})"
+        items.append(f"{_json_key(cls, field.name)!r}: {value}")
+    source = f"def encode(obj):\n    return {{{', '.join(items)}}}\n"
+    exec(source, namespace)
+    return namespace["encode"]
+
+
+def _compile_decoder(cls: type) -> Decoder:
+    hints = typing.get_type_hints(cls)
+    namespace: dict[str, Any] = {"cls": cls}
+    lines = ["def decode(data):", "    kwargs = {}"]
+    for field in dataclasses.fields(cls):
+        if not field.init:
+            continue
+        key = _json_key(cls, field.name)
+        value = f"data[{key!r}]"
+        convert = _value_decoder(hints[field.name])
+        if convert is not None:
+            namespace[f"_decode_{field.name}"] = convert
+            value = f"_decode_{field.name}({value})"
+        has_default = (
+            field.default is not dataclasses.MISSING
+            or field.default_factory is not dataclasses.MISSING
+        )
+        if has_default:
+            # Leave the field out so the dataclass fills in its own default.
+            lines.append(f"    if {key!r} in data:")
+            lines.append(f"        kwargs[{field.name!r}] = {value}")
+        else:
+            lines.append(f"    kwargs[{field.name!r}] = {value}")
+    lines.append("    return cls(**kwargs)")
+    exec("\n".join(lines) + "\n", namespace)
+    return namespace["decode"]
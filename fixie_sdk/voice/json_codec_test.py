@@ -0,0 +1,47 @@
+import dataclasses
+import enum
+from typing import Optional
+
+from fixie_sdk.voice import json_codec
+
+
+class Color(enum.StrEnum):
+    RED = "red"
+
+
+@dataclasses.dataclass
+class Inner:
+    some_value: int = 0
+
+
+@dataclasses.dataclass
+class Outer:
+    dataclass_json_config = {"letter_case": json_codec.camel_case}
+
+    color: Color
+    inner_value: Optional[Inner] = None
+    items: list[int] = dataclasses.field(default_factory=list)
+
+
+def test_camel_case():
+    assert json_codec.camel_case("type") == "type"
+    assert json_codec.camel_case("base_url") == "baseUrl"
+    assert json_codec.camel_case("last_voice_timestamp") == "lastVoiceTimestamp"
+
+
+def test_round_trip():
+    obj = Outer(color=Color.RED, inner_value=Inner(some_value=3), items=[1])
+    data = json_codec.get_encoder(Outer)(obj)
+    assert data == {"color": "red", "innerValue": {"some_value": 3}, "items": [1]}
+    assert json_codec.get_decoder(Outer)(data) == obj
+
+
+def test_decode_defaults():
+    obj = json_codec.get_decoder(Outer)({"color": "red", "innerValue": None})
+    assert obj == Outer(color=Color.RED)
+    assert obj.items == []
+
+
+def test_stdlib_backend(monkeypatch):
+    monkeypatch.setattr(json_codec, "orjson_imported", False)
+    assert json_codec.loads(json_codec.dumps({"a": [1, "b"]})) == {"a": [1, "b"]}
@@ -0,0 +1,317 @@
+import abc
+import bisect
+import collections
+import dataclasses
+import enum
+import time
+from typing import Callable, Optional, Sequence
+
+from fixie_sdk.voice import types
+
+# Histogram bucket upper bounds, in seconds.
+DEFAULT_BUCKETS = (
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+    60.0,
+    300.0,
+)
+DEFAULT_PREFIX = "fixie_voice"
+# Number of recent pings used for RTT percentiles and loss rate.
+RTT_WINDOW = 64
+# A ping that hasn't been answered after this many seconds is counted as lost.
+PING_TIMEOUT = 3.0
+# Smoothing factor for the RTT jitter estimate, as in RFC 3550.
+RTT_JITTER_SMOOTHING = 1 / 16
+# The link is considered degraded when the p95 RTT is above this...
+DEGRADED_RTT_MS = 500.0
+# ...or when at least this many of the last RECENT_PINGS pings were lost.
+DEGRADED_LOST_PINGS = 2
+RECENT_PINGS = 10
+
+
+class Milestone(enum.StrEnum):
+    """Points in the life of a session that are recorded once."""
+
+    WS_CONNECTED = "ws_connected"
+    ROOM_INFO = "room_info"
+    ROOM_CONNECTED = "room_connected"
+    TRACK_PUBLISHED = "track_published"
+    TRACK_SUBSCRIBED = "track_subscribed"
+    FIRST_AUDIO = "first_audio"
+    FIRST_TRANSCRIPT = "first_transcript"
+
+
+@dataclasses.dataclass
+class StateTransition:
+    state: types.SessionState
+    time: float
+
+
+class SessionTimeline:
+    """Monotonic timestamps of a session's milestones and state changes.
+
+    Times are measured from when the timeline was created; everything other
+    than the accessors is cheap enough to call from the audio path.
+    """
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic):
+        self._clock = clock
+        self._start = clock()
+        self._end: Optional[float] = None
+        self._milestones: dict[Milestone, float] = {}
+        self._transitions: list[StateTransition] = []
+
+    @property
+    def start(self) -> float:
+        return self._start
+
+    @property
+    def milestones(self) -> dict[Milestone, float]:
+        """Time of each milestone reached so far, in ms since the start."""
+        return {m: (t - self._start) * 1000 for m, t in self._milestones.items()}
+
+    @property
+    def transitions(self) -> list[StateTransition]:
+        return list(self._transitions)
+
+    def mark(self, milestone: Milestone) -> bool:
+        """Records a milestone, unless it has already been reached. Returns whether it was new."""
+        if milestone in self._milestones:
+            return False
+        self._milestones[milestone] = self._clock()
+        return True
+
+    def enter_state(self, state: types.SessionState):
+        self._transitions.append(StateTransition(state, self._clock()))
+
+    def finish(self):
+        """Ends the timeline, so that the last state stops accruing time."""
+        if self._end is None:
+            self._end = self._clock()
+
+    def state_dwells(self) -> list[tuple[types.SessionState, float]]:
+        """Each visit to a state and how long it lasted, in ms, in order."""
+        end = self._end if self._end is not None else self._clock()
+        ends = [t.time for t in self._transitions[1:]] + [end]
+        return [
+            (t.state, (until - t.time) * 1000)
+            for t, until in zip(self._transitions, ends)
+        ]
+
+    def state_durations(self) -> dict[types.SessionState, float]:
+        """Total time spent in each state, in ms."""
+        durations: dict[types.SessionState, float] = {}
+        for state, dwell in self.state_dwells():
+            durations[state] = durations.get(state, 0.0) + dwell
+        return durations
+
+
+@dataclasses.dataclass
+class RttStats:
+    """Round-trip times over the recent window, in ms, and ping loss counters."""
+
+    last_ms: float = 0
+    p50_ms: float = 0
+    p95_ms: float = 0
+    p99_ms: float = 0
+    jitter_ms: float = 0
+    pings_sent: int = 0
+    pongs_received: int = 0
+    pings_lost: int = 0
+    loss_rate: float = 0
+
+
+class RttTracker:
+    """Matches pings with pongs to track round-trip time, jitter and loss.
+
+    Pings are identified by the timestamp they carry, which the server
+    echoes back. Pings that aren't answered within `timeout` seconds are
+    counted as lost when expire() is called; pongs that arrive after that are
+    ignored. Times are in seconds on any monotonic clock.
+    """
+
+    def __init__(self, window: int = RTT_WINDOW, timeout: float = PING_TIMEOUT):
+        self._timeout = timeout
+        self._outstanding: set[float] = set()
+        self._rtts: collections.deque[float] = collections.deque(maxlen=window)
+        # True for each ping that was answered, False for each that was lost.
+        self._outcomes: collections.deque[bool] = collections.deque(maxlen=window)
+        self._stats = RttStats()
+
+    @property
+    def stats(self) -> RttStats:
+        ordered = sorted(self._rtts)
+        outcomes = len(self._outcomes)
+        return dataclasses.replace(
+            self._stats,
+            p50_ms=_percentile(ordered, 50),
+            p95_ms=_percentile(ordered, 95),
+            p99_ms=_percentile(ordered, 99),
+            loss_rate=self._outcomes.count(False) / outcomes if outcomes else 0,
+        )
+
+    @property
+    def degraded(self) -> bool:
+        """Whether the link currently looks unhealthy: slow, or dropping pings."""
+        recent = list(self._outcomes)[-RECENT_PINGS:]
+        if recent.count(False) >= DEGRADED_LOST_PINGS or (recent and not recent[-1]):
+            return True
+        return _percentile(sorted(self._rtts), 95) > DEGRADED_RTT_MS
+
+    def on_ping(self, timestamp: float):
+        self._outstanding.add(timestamp)
+        self._stats.pings_sent += 1
+
+    def on_pong(self, timestamp: float, now: float) -> Optional[float]:
+        """Records the pong for the ping sent at `timestamp` and returns its RTT in ms.
+
+        Returns None for pongs that don't match a ping still awaiting an answer.
+        """
+        if timestamp not in self._outstanding:
+            return None
+        self._outstanding.remove(timestamp)
+        rtt_ms = (now - timestamp) * 1000
+        if self._rtts:
+            delta = abs(rtt_ms - self._stats.last_ms)
+            self._stats.jitter_ms += (
+                delta - self._stats.jitter_ms
+            ) * RTT_JITTER_SMOOTHING
+        self._rtts.append(rtt_ms)
+        self._outcomes.append(True)
+        self._stats.last_ms = rtt_ms
+        self._stats.pongs_received += 1
+        return rtt_ms
+
+    def expire(self, now: float) -> int:
+        """Counts pings that have gone unanswered for too long as lost, and returns how many."""
+        lost = [t for t in self._outstanding if now - t > self._timeout]
+        for timestamp in lost:
+            self._outstanding.remove(timestamp)
+            self._outcomes.append(False)
+        self._stats.pings_lost += len(lost)
+        return len(lost)
+
+
+def _percentile(ordered: list[float], percent: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not ordered:
+        return 0.0
+    rank = max(0, -(-len(ordered) * percent // 100) - 1)
+    return ordered[int(rank)]
+
+
+class MetricsExporter(abc.ABC):
+    """Receives the timeline of each session when it ends."""
+
+    @abc.abstractmethod
+    def export(self, timeline: SessionTimeline):
+        pass
+
+
+class Histogram:
+    """Cumulative histogram with fixed bucket bounds, as in Prometheus."""
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self._bounds = list(buckets)
+        self._counts = [0] * (len(self._bounds) + 1)
+        self._sum = 0.0
+        self._count = 0
+
+    @property
+    def count(self) -> int:
+        return self._count
+
+    @property
+    def sum(self) -> float:
+        return self._sum
+
+    def observe(self, value: float):
+        self._counts[bisect.bisect_left(self._bounds, value)] += 1
+        self._sum += value
+        self._count += 1
+
+    def cumulative_counts(self) -> list[tuple[float, int]]:
+        """(upper bound, count of values <= bound) for each bucket, ending with +Inf."""
+        result = []
+        total = 0
+        for bound, count in zip(self._bounds + [float("inf")], self._counts):
+            total += count
+            result.append((bound, total))
+        return result
+
+
+class HistogramExporter(MetricsExporter):
+    """Aggregates session timelines in-process into histograms.
+
+    Tracks the time from session start to each milestone, and the dwell time
+    of each visit to each state. to_openmetrics() renders everything in the
+    OpenMetrics text format, suitable for serving to a Prometheus scraper.
+    """
+
+    def __init__(
+        self,
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+        prefix: str = DEFAULT_PREFIX,
+    ):
+        self._buckets = buckets
+        self._prefix = prefix
+        self._sessions = 0
+        self._milestones: dict[str, Histogram] = {}
+        self._dwells: dict[str, Histogram] = {}
+
+    @property
+    def sessions(self) -> int:
+        return self._sessions
+
+    def milestone_histogram(self, milestone: Milestone) -> Optional[Histogram]:
+        return self._milestones.get(milestone)
+
+    def state_histogram(self, state: types.SessionState) -> Optional[Histogram]:
+        return self._dwells.get(state)
+
+    def export(self, timeline: SessionTimeline):
+        self._sessions += 1
+        for milestone, ms in timeline.milestones.items():
+            self._observe(self._milestones, milestone, ms / 1000)
+        for state, ms in timeline.state_dwells():
+            self._observe(self._dwells, state, ms / 1000)
+
+    def to_openmetrics(self) -> str:
+        lines = [
+            f"# TYPE {self._prefix}_sessions counter",
+            f"{self._prefix}_sessions_total {self._sessions}",
+        ]
+        lines += self._render("milestone_seconds", "milestone", self._milestones)
+        lines += self._render("state_dwell_seconds", "state", self._dwells)
+        lines.append("# EOF")
+        return "\n".join(lines) + "\n"
+
+    def _observe(self, histograms: dict[str, Histogram], label: str, value: float):
+        histogram = histograms.get(label)
+        if histogram is None:
+            histogram = histograms[label] = Histogram(self._buckets)
+        histogram.observe(value)
+
+    def _render(
+        self, name: str, label_name: str, histograms: dict[str, Histogram]
+    ) -> list[str]:
+        name = f"{self._prefix}_{name}"
+        lines = [f"# TYPE {name} histogram", f"# UNIT {name} seconds"]
+        for label, histogram in sorted(histograms.items()):
+            for bound, count in histogram.cumulative_counts():
+                le = "+Inf" if bound == float("inf") else repr(float(bound))
+                lines.append(
+                    f'{name}_bucket{{{label_name}="{label}",le="{le}"}} {count}'
+                )
+            lines.append(f'{name}_sum{{{label_name}="{label}"}} {histogram.sum}')
+            lines.append(f'{name}_count{{{label_name}="{label}"}} {histogram.count}')
+        return lines
@@ -0,0 +1,105 @@
+import pytest
+
+from fixie_sdk.voice import metrics
+from fixie_sdk.voice.types import SessionState
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_milestones_recorded_once():
+    clock = FakeClock()
+    timeline = metrics.SessionTimeline(clock)
+    clock.now += 0.25
+    assert timeline.mark(metrics.Milestone.WS_CONNECTED)
+    clock.now += 0.25
+    assert not timeline.mark(metrics.Milestone.WS_CONNECTED)
+    assert timeline.milestones == {metrics.Milestone.WS_CONNECTED: 250.0}
+
+
+def test_state_dwells():
+    clock = FakeClock()
+    timeline = metrics.SessionTimeline(clock)
+    timeline.enter_state(SessionState.LISTENING)
+    clock.now += 2
+    timeline.enter_state(SessionState.THINKING)
+    clock.now += 0.5
+    timeline.enter_state(SessionState.LISTENING)
+    clock.now += 1
+    timeline.finish()
+    clock.now += 10
+    assert timeline.state_dwells() == [
+        (SessionState.LISTENING, 2000),
+        (SessionState.THINKING, 500),
+        (SessionState.LISTENING, 1000),
+    ]
+    assert timeline.state_durations() == {
+        SessionState.LISTENING: 3000,
+        SessionState.THINKING: 500,
+    }
+
+
+def test_histogram_exporter_openmetrics():
+    clock = FakeClock()
+    exporter = metrics.HistogramExporter(buckets=[0.1, 1.0])
+    for delay in [0.05, 0.5]:
+        timeline = metrics.SessionTimeline(clock)
+        timeline.enter_state(SessionState.LISTENING)
+        clock.now += delay
+        timeline.mark(metrics.Milestone.ROOM_CONNECTED)
+        timeline.finish()
+        exporter.export(timeline)
+
+    histogram = exporter.milestone_histogram(metrics.Milestone.ROOM_CONNECTED)
+    assert histogram is not None
+    assert histogram.cumulative_counts() == [(0.1, 1), (1.0, 2), (float("inf"), 2)]
+    text = exporter.to_openmetrics()
+    assert "fixie_voice_sessions_total 2\n" in text
+    assert (
+        'fixie_voice_milestone_seconds_bucket{milestone="room_connected",le="0.1"} 1'
+        in text
+    )
+    assert 'fixie_voice_state_dwell_seconds_count{state="listening"} 2' in text
+    assert text.endswith("# EOF\n")
+
+
+def test_rtt_tracker_stats():
+    tracker = metrics.RttTracker()
+    for i, rtt in enumerate([0.05, 0.1, 0.07, 0.3]):
+        tracker.on_ping(i)
+        assert tracker.on_pong(i, i + rtt) == pytest.approx(rtt * 1000)
+    assert tracker.on_pong(99, 100) is None
+    stats = tracker.stats
+    assert stats.last_ms == pytest.approx(300)
+    assert stats.p50_ms == pytest.approx(70)
+    assert stats.p99_ms == pytest.approx(300)
+    assert stats.jitter_ms > 0
+    assert stats.pongs_received == 4
+    assert not tracker.degraded
+
+
+def test_rtt_tracker_detects_loss():
+    tracker = metrics.RttTracker(timeout=1)
+    tracker.on_ping(0)
+    assert tracker.expire(0.5) == 0
+    assert tracker.expire(1.5) == 1
+    assert tracker.on_pong(0, 2) is None
+    assert tracker.degraded
+    assert tracker.stats.pings_lost == 1
+    assert tracker.stats.loss_rate == 1
+
+    tracker.on_ping(2)
+    tracker.on_pong(2, 2.05)
+    assert not tracker.degraded
+
+
+def test_rtt_tracker_degraded_by_latency():
+    tracker = metrics.RttTracker()
+    tracker.on_ping(0)
+    tracker.on_pong(0, (metrics.DEGRADED_RTT_MS + 100) / 1000)
+    assert tracker.degraded
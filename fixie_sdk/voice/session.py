@@ -1,6 +1,7 @@
 import asyncio
 import dataclasses
 import logging
+import time
 from typing import Optional
 
 import websockets
@@ -8,10 +9,49 @@ from livekit import rtc
 from pyee import asyncio as pyee_asyncio
 
 from fixie_sdk.voice import audio_base
+from fixie_sdk.voice import audio_jitter
 from fixie_sdk.voice import audio_track
+from fixie_sdk.voice import metrics
 from fixie_sdk.voice import types
 
+# Seconds between pings while the link is healthy...
 PING_INTERVAL = 5
+# ...while it looks degraded, so that we notice quickly when it recovers or fails...
+PING_INTERVAL_DEGRADED = 1
+# ...and while the session is warmed up but not yet started.
+PING_INTERVAL_IDLE = 15
+
+
+class OutputBuilder:
+    """Accumulates streamed text without re-copying it on every append.
+
+    The full text is only assembled when `text` is read, and is cached until
+    the next append.
+    """
+
+    def __init__(self) -> None:
+        self._parts: list[str] = []
+        self._length = 0
+
+    def __len__(self) -> int:
+        return self._length
+
+    @property
+    def text(self) -> str:
+        if len(self._parts) > 1:
+            self._parts = ["".join(self._parts)]
+        return self._parts[0] if self._parts else ""
+
+    def append(self, delta: str) -> int:
+        """Adds `delta` and returns the offset at which it starts."""
+        offset = self._length
+        self._parts.append(delta)
+        self._length += len(delta)
+        return offset
+
+    def clear(self):
+        self._parts = []
+        self._length = 0
 
 
 @dataclasses.dataclass
@@ -24,6 +64,22 @@ class VoiceSessionParams:
     tts_voice: Optional[str] = None
     model: Optional[str] = None
     agent_id: Optional[str] = None
+    # Smooth out network jitter on the received audio before it reaches the sink.
+    jitter_buffer: bool = False
+    # Duration of the audio frames we send, in ms (10 or 20).
+    send_frame_ms: int = 10
+    # Don't send frames of silence (including while the agent is speaking). This
+    # saves uplink bandwidth, but relies on the server tolerating gaps in the audio.
+    dtx: bool = False
+    # Keep listening to the source while the agent is speaking, and interrupt it
+    # as soon as the user talks over it. Raise the threshold if the agent's own
+    # audio can reach the microphone (e.g., on a speakerphone).
+    barge_in: bool = False
+    barge_in_threshold_dbfs: float = -35.0
+    barge_in_ms: int = audio_track.DEFAULT_BARGE_IN_MS
+    # Emit just the new text of the agent's response, as "output_delta" events,
+    # rather than the whole response so far as non-final "output" events.
+    output_deltas: bool = False
 
 
 class VoiceSession(pyee_asyncio.AsyncIOEventEmitter):
@@ -32,35 +88,127 @@ class VoiceSession(pyee_asyncio.AsyncIOEventEmitter):
         source: audio_base.AudioSource,
         sink: audio_base.AudioSink,
         params: VoiceSessionParams,
+        metrics_exporter: Optional[metrics.MetricsExporter] = None,
     ):
         super().__init__()
         self._params = params
         self._state = types.SessionState.IDLE
+        self._timeline = metrics.SessionTimeline()
+        self._timeline.enter_state(self._state)
+        self._metrics_exporter = metrics_exporter
         self._socket = None
         self._receive_task: Optional[asyncio.Task] = None
         self._ping_task: Optional[asyncio.Task] = None
         self._room: rtc.Room = None
         self._room_emitter = pyee_asyncio.AsyncIOEventEmitter()
         self._source = source
-        self._source_adapter = audio_track.AudioSourceToSendTrackAdapter(source)
+        self._source_adapter = audio_track.AudioSourceToSendTrackAdapter(
+            source,
+            params.send_frame_ms,
+            params.dtx,
+            params.barge_in_threshold_dbfs if params.barge_in else None,
+            params.barge_in_ms,
+        )
+        self._source_adapter.on("barge_in", self._on_barge_in)
         self._source_adapter.enabled = False
         self._sink = sink
         self._sink_adapter: Optional[audio_track.AudioSinkFromRecvTrackAdapter] = None
         self._started = False
-        self._pending_output = ""
+        self._room_connected = asyncio.Event()
+        self._phase_timings: dict[str, float] = {}
+        self._rtt = metrics.RttTracker()
+        # When the user stopped speaking in the current turn, until we hear the reply.
+        self._turn_end: Optional[float] = None
+        self._listen_start = 0.0
+        self._degraded = False
+        self._warmup_start = 0.0
+        self._init_sent = 0.0
+        self._pending_output = OutputBuilder()
 
     @property
     def state(self):
         return self._state
 
+    @property
+    def pending_output(self) -> str:
+        """The agent's response so far, while it is being streamed."""
+        return self._pending_output.text
+
+    @property
+    def jitter_buffer_stats(self) -> Optional[audio_jitter.JitterBufferStats]:
+        """Playout buffer depth and concealment counters, if the jitter buffer is enabled."""
+        if self._sink_adapter and self._sink_adapter.jitter_buffer:
+            return self._sink_adapter.jitter_buffer.stats
+        return None
+
+    @property
+    def timeline(self) -> metrics.SessionTimeline:
+        """Timestamps of this session's milestones and state changes."""
+        return self._timeline
+
+    @property
+    def rtt_stats(self) -> metrics.RttStats:
+        """Round-trip times to the worker, measured by pinging over the data channel."""
+        return self._rtt.stats
+
+    @property
+    def degraded(self) -> bool:
+        """Whether the link to the worker currently looks slow or lossy."""
+        return self._degraded
+
+    @property
+    def phase_timings(self) -> dict[str, float]:
+        """Duration in ms of each startup phase that has completed so far.
+
+        The phases are: init_message, track_prepare, ws_connect, room_info
+        (waiting for the server after sending the init message),
+        room_connect, track_publish, and warmup (from the start of warmup()
+        until the room is connected).
+        """
+        return dict(self._phase_timings)
+
     async def warmup(self):
         url = self._params.webrtc_url
         logging.info(f"[session] Connecting to {url}")
-        self._socket = await websockets.connect(url)
-        msg = self._create_init_message()
-        await self._socket.send(msg.to_json())
+        self._phase_timings.clear()
+        self._warmup_start = time.perf_counter()
+
+        # Start connecting right away, and do the local setup while DNS, TCP
+        # and TLS are in flight; yielding once lets the connection get started.
+        connect_task = asyncio.create_task(self._connect_socket(url))
+        await asyncio.sleep(0)
+        start = time.perf_counter()
+        init_message = types.message_to_json(self._create_init_message())
+        self._record_phase("init_message", start)
+        start = time.perf_counter()
+        self._source_adapter.prepare()
+        self._record_phase("track_prepare", start)
+
+        self._socket = await connect_task
+        self._record_phase("ws_connect", self._warmup_start)
+        self._timeline.mark(metrics.Milestone.WS_CONNECTED)
+        await self._socket.send(init_message)
+        self._init_sent = time.perf_counter()
         self._receive_task = asyncio.create_task(self._socket_receive())
 
+    async def wait_connected(self):
+        """Waits until warmup has finished and the session is connected to its room."""
+        await self._room_connected.wait()
+
+    async def attach(self, source: audio_base.AudioSource, sink: audio_base.AudioSink):
+        """Replaces the audio source and sink, e.g. for a session that was warmed up ahead of time.
+
+        Must be called before start().
+        """
+        if self._started:
+            raise RuntimeError("Can't attach audio to a started session")
+        source.enabled = self._source_adapter.enabled
+        self._source_adapter.source = source
+        self._source = source
+        if self._sink_adapter:
+            await self._sink_adapter.set_sink(sink)
+        self._sink = sink
+
     async def start(self):
         logging.info("[session] Starting...")
         self._started = True
@@ -68,7 +216,7 @@ class VoiceSession(pyee_asyncio.AsyncIOEventEmitter):
 
     async def stop(self):
         logging.info("[session] Stopping...")
-        self._started = False
+        was_started, self._started = self._started, False
         await self._source_adapter.close()
         if self._sink_adapter:
             await self._sink_adapter.close()
@@ -80,26 +228,59 @@ class VoiceSession(pyee_asyncio.AsyncIOEventEmitter):
         if self._room:
             await self._room.disconnect()
             self._room = None
+        self._room_connected.clear()
         if self._socket:
             await self._socket.close()
             await self._receive_task
             self._receive_task = None
         self._socket = None
         self._change_state(types.SessionState.IDLE)
+        self._timeline.finish()
+        # Sessions that were warmed up but never used would skew the metrics.
+        if was_started and self._metrics_exporter:
+            self._metrics_exporter.export(self._timeline)
 
     async def interrupt(self):
         logging.info("[session] Interrupting...")
         await self._send_data(types.InterruptMessage())
 
-    async def _ping_loop(self, interval: float):
+    async def _connect_socket(self, url: str):
+        return await websockets.connect(url)
+
+    def _record_phase(self, phase: str, start: float):
+        self._phase_timings[phase] = (time.perf_counter() - start) * 1000
+
+    async def _ping_loop(self):
+        loop = asyncio.get_running_loop()
         try:
             while True:
-                timestamp = asyncio.get_event_loop().time()
+                timestamp = loop.time()
+                if self._rtt.expire(timestamp):
+                    logging.warning("[session] ping lost")
+                    self._update_degraded()
+                self._rtt.on_ping(timestamp)
                 await self._send_data(types.PingMessage(timestamp=timestamp))
-                await asyncio.sleep(interval)
+                await asyncio.sleep(self._ping_interval())
         except asyncio.CancelledError:
             pass
 
+    def _ping_interval(self) -> float:
+        if self._degraded:
+            return PING_INTERVAL_DEGRADED
+        if not self._started:
+            return PING_INTERVAL_IDLE
+        return PING_INTERVAL
+
+    def _update_degraded(self):
+        degraded = self._rtt.degraded
+        if degraded != self._degraded:
+            self._degraded = degraded
+            if degraded:
+                logging.warning(f"[session] link degraded: {self._rtt.stats}")
+            else:
+                logging.info("[session] link recovered")
+            self.emit("degraded", degraded)
+
     async def _socket_receive(self):
         try:
             async for message in self._socket:
@@ -113,19 +294,31 @@ class VoiceSession(pyee_asyncio.AsyncIOEventEmitter):
 
     async def _on_message(self, payload: str):
         msg = types.message_from_json(payload)
+        if msg is None:
+            return
+
         logging.debug(f"[session] msg: {msg.type}")
         match msg.type:
             case "room_info":
+                self._record_phase("room_info", self._init_sent)
+                self._timeline.mark(metrics.Milestone.ROOM_INFO)
                 self._room = rtc.Room()
                 self._room.on("track_subscribed", self._on_track_subscribed)
                 self._room.on("data_received", self._on_data_received)
                 self._room_emitter.on(
                     "track_subscribed", self._async_on_track_subscribed
                 )
+                start = time.perf_counter()
                 await self._room.connect(msg.room_url, msg.token)
+                self._record_phase("room_connect", start)
+                self._record_phase("warmup", self._warmup_start)
+                self._timeline.mark(metrics.Milestone.ROOM_CONNECTED)
                 logging.info(f"[session] connected to room: {self._room.name}")
-                self._ping_task = asyncio.create_task(self._ping_loop(PING_INTERVAL))
+                self._room_connected.set()
+                # Pinging and publishing our track don't depend on each other.
+                self._ping_task = asyncio.create_task(self._ping_loop())
                 await self._maybe_publish_local_audio()
+                logging.info(f"[session] startup phases (ms): {self._phase_timings}")
 
             case _:
                 logging.error(f"[session] unknown message type {msg['type']}")
@@ -145,11 +338,21 @@ class VoiceSession(pyee_asyncio.AsyncIOEventEmitter):
         participant: rtc.Participant,
     ):
         logging.info(f"[session] subscribed to remote audio track {track.sid}")
+        self._timeline.mark(metrics.Milestone.TRACK_SUBSCRIBED)
         if self._state == types.SessionState.THINKING:
             self._change_state(types.SessionState.SPEAKING)
+        jitter_buffer = None
+        if self._params.jitter_buffer:
+            jitter_buffer = audio_jitter.JitterBuffer()
         self._sink_adapter = audio_track.AudioSinkFromRecvTrackAdapter(
-            self._sink, track
+            self._sink, track, jitter_buffer
+        )
+        self._sink_adapter.once(
+            "first_frame", lambda: self._timeline.mark(metrics.Milestone.FIRST_AUDIO)
         )
+        self._sink_adapter.on("audio_start", self._on_audio_start)
+        if self._turn_end is not None:
+            self._sink_adapter.watch_for_audio()
         await self._sink_adapter.start()
 
     def _on_data_received(
@@ -159,15 +362,19 @@ class VoiceSession(pyee_asyncio.AsyncIOEventEmitter):
         participant: rtc.Participant,
         topic: str,
     ):
-        msg = types.message_from_json(payload.decode("utf-8"))
+        msg = types.message_from_json(payload)
         if msg is None:
             return
 
         logging.debug(f"[session] dc_msg: {msg.type}")
         match msg.type:
             case "pong":
-                elapsed_ms = (asyncio.get_event_loop().time() - msg.timestamp) * 1000
-                logging.debug(f"[session] worker RTT: {elapsed_ms:.0f} ms")
+                now = asyncio.get_running_loop().time()
+                rtt_ms = self._rtt.on_pong(msg.timestamp, now)
+                if rtt_ms is not None:
+                    logging.debug(f"[session] worker RTT: {rtt_ms:.0f} ms")
+                    self.emit("rtt", self._rtt.stats)
+                    self._update_degraded()
             case "state":
                 new_state = msg.state
                 if (
@@ -181,12 +388,18 @@ class VoiceSession(pyee_asyncio.AsyncIOEventEmitter):
                     self._change_state(new_state)
             case "transcript":
                 transcript = msg.transcript
+                self._timeline.mark(metrics.Milestone.FIRST_TRANSCRIPT)
                 self._on_input_change(transcript.text, transcript.final)
             case "output_delta":
-                self._pending_output += msg.delta
-                self._on_output_change(self._pending_output, False)
+                offset = self._pending_output.append(msg.delta)
+                if self._params.output_deltas:
+                    self.emit("output_delta", msg.delta, offset)
+                elif self.listeners("output"):
+                    # Assembling the full text for every delta is quadratic,
+                    # so only do it if someone is listening.
+                    self._on_output_change(self._pending_output.text, False)
             case "output":
-                self._pending_output = ""
+                self._pending_output.clear()
                 self._on_output_change(msg.text, True)
             case "latency":
                 self._on_latency_change(msg.kind, msg.value)
@@ -202,14 +415,56 @@ class VoiceSession(pyee_asyncio.AsyncIOEventEmitter):
     def _on_latency_change(self, metric: types.SessionMetric, value: float):
         self.emit("latency", metric, value)
 
+    async def _on_barge_in(self, onset: float):
+        if self._state != types.SessionState.SPEAKING:
+            return
+        logging.info("[session] barge-in detected, interrupting")
+        # Stop playback and unmute first; telling the server can happen after.
+        self._source_adapter.muted = False
+        if self._sink_adapter:
+            await self._sink_adapter.interrupt()
+        reaction_ms = (asyncio.get_running_loop().time() - onset) * 1000
+        self.emit("barge_in", reaction_ms)
+        await self.interrupt()
+
+    def _on_audio_start(self, time: float):
+        if self._turn_end is not None:
+            latency_ms = (time - self._turn_end) * 1000
+            self._turn_end = None
+            self._on_latency_change(types.SessionMetric.END_TO_END, latency_ms)
+
+    def _on_turn_end(self):
+        # Only count turns where the user actually spoke while we were listening.
+        last_speech = self._source_adapter.last_speech_time
+        if last_speech is None or last_speech < self._listen_start:
+            return
+        self._turn_end = last_speech
+        if self._sink_adapter:
+            self._sink_adapter.watch_for_audio()
+
     def _change_state(self, state: types.SessionState):
         if state != self._state:
+            if self._state == types.SessionState.LISTENING and state in (
+                types.SessionState.THINKING,
+                types.SessionState.SPEAKING,
+            ):
+                self._on_turn_end()
+            elif state == types.SessionState.LISTENING:
+                self._listen_start = asyncio.get_running_loop().time()
             self._state = state
+            self._timeline.enter_state(state)
             self.emit("state", state)
+            if self._sink_adapter and state != types.SessionState.SPEAKING:
+                self._sink_adapter.resume()
             if self._state == types.SessionState.LISTENING:
                 self._source_adapter.enabled = True
+                self._source_adapter.muted = False
             elif self._state == types.SessionState.SPEAKING:
-                self._source_adapter.enabled = False
+                if self._params.barge_in:
+                    self._source_adapter.enabled = True
+                    self._source_adapter.muted = True
+                else:
+                    self._source_adapter.enabled = False
 
     def _create_init_message(self):
         asr = tts = None
@@ -234,13 +489,16 @@ class VoiceSession(pyee_asyncio.AsyncIOEventEmitter):
     async def _maybe_publish_local_audio(self):
         if self._room and self._room.isconnected() and self._started:
             logging.info("[session] publishing local audio track")
+            start = time.perf_counter()
             opts = rtc.TrackPublishOptions()
             opts.source = rtc.TrackSource.SOURCE_MICROPHONE
             await self._source_adapter.start()
             await self._room.local_participant.publish_track(
                 self._source_adapter.track, opts
             )
+            self._record_phase("track_publish", start)
+            self._timeline.mark(metrics.Milestone.TRACK_PUBLISHED)
 
     async def _send_data(self, msg):
         assert self._room is not None
-        await self._room.local_participant.publish_data(msg.to_json())
+        await self._room.local_participant.publish_data(types.message_to_json(msg))
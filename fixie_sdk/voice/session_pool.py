@@ -0,0 +1,204 @@
+import asyncio
+import collections
+import dataclasses
+import logging
+from typing import Callable, Optional
+
+from fixie_sdk.voice import audio_base
+from fixie_sdk.voice.session import VoiceSession
+from fixie_sdk.voice.session import VoiceSessionParams
+
+# Number of warm sessions to keep for each parameter set.
+DEFAULT_POOL_SIZE = 2
+# Warm sessions older than this are discarded, since the server may have dropped them.
+DEFAULT_MAX_IDLE_AGE = 60.0
+# How long we'll wait for a session to connect to its room while warming it up.
+WARMUP_TIMEOUT = 10.0
+
+SessionFactory = Callable[
+    [audio_base.AudioSource, audio_base.AudioSink, VoiceSessionParams], VoiceSession
+]
+
+
+@dataclasses.dataclass
+class VoiceSessionPoolStats:
+    """Counters for a VoiceSessionPool."""
+
+    hits: int = 0
+    misses: int = 0
+    expired: int = 0
+    failed: int = 0
+    idle: int = 0
+    warming: int = 0
+
+
+@dataclasses.dataclass
+class _PoolKey:
+    params: VoiceSessionParams
+    sample_rate: int
+    num_channels: int
+
+
+@dataclasses.dataclass
+class _WarmSession:
+    session: VoiceSession
+    created_at: float
+    failed: bool = False
+
+    def on_error(self, error):
+        logging.warning(f"[pool] warm session failed: {error}")
+        self.failed = True
+
+
+class VoiceSessionPool:
+    """Keeps VoiceSessions warmed up ahead of time, so that calls can start immediately.
+
+    For each set of parameters that has been used (or registered with
+    prewarm), the pool keeps `size` sessions that have already connected to
+    the server and joined their room. acquire() attaches the caller's source
+    and sink to one of them, or falls back to a cold start if none is ready.
+    The pool is refilled in the background, and sessions that have been idle
+    for longer than `max_idle_age` seconds are replaced.
+    """
+
+    def __init__(
+        self,
+        size: int = DEFAULT_POOL_SIZE,
+        max_idle_age: float = DEFAULT_MAX_IDLE_AGE,
+        session_factory: SessionFactory = VoiceSession,
+    ):
+        self._size = size
+        self._max_idle_age = max_idle_age
+        self._session_factory = session_factory
+        self._keys: dict[tuple, _PoolKey] = {}
+        self._idle: dict[tuple, collections.deque[_WarmSession]] = {}
+        self._warming: dict[tuple, int] = {}
+        self._tasks: set[asyncio.Task] = set()
+        self._reaper_task: Optional[asyncio.Task] = None
+        self._stats = VoiceSessionPoolStats()
+
+    @property
+    def stats(self) -> VoiceSessionPoolStats:
+        return dataclasses.replace(
+            self._stats,
+            idle=sum(len(idle) for idle in self._idle.values()),
+            warming=sum(self._warming.values()),
+        )
+
+    def prewarm(
+        self,
+        params: VoiceSessionParams,
+        sample_rate: int = 48000,
+        num_channels: int = 1,
+    ):
+        """Starts keeping warm sessions for the given parameters and source format."""
+        self._refill(self._register(params, sample_rate, num_channels))
+        if not self._reaper_task:
+            self._reaper_task = asyncio.create_task(self._reap_loop())
+
+    async def acquire(
+        self,
+        source: audio_base.AudioSource,
+        sink: audio_base.AudioSink,
+        params: VoiceSessionParams,
+    ) -> VoiceSession:
+        """Returns a session for the given source, sink and parameters, warmed up if possible."""
+        key = self._register(params, source.sample_rate, source.num_channels)
+        if not self._reaper_task:
+            self._reaper_task = asyncio.create_task(self._reap_loop())
+        self._expire(key)
+        idle = self._idle[key]
+        try:
+            if idle:
+                warm = idle.popleft()
+                warm.session.remove_listener("error", warm.on_error)
+                await warm.session.attach(source, sink)
+                self._stats.hits += 1
+                logging.info("[pool] using warm session")
+                return warm.session
+            self._stats.misses += 1
+            logging.info("[pool] no warm session available, starting one")
+            session = self._session_factory(source, sink, params)
+            await session.warmup()
+            return session
+        finally:
+            self._refill(key)
+
+    async def close(self):
+        """Stops all idle sessions and background work."""
+        if self._reaper_task:
+            self._reaper_task.cancel()
+            self._reaper_task = None
+        for task in list(self._tasks):
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        for idle in self._idle.values():
+            while idle:
+                await self._discard(idle.popleft())
+
+    def _register(
+        self, params: VoiceSessionParams, sample_rate: int, num_channels: int
+    ) -> tuple:
+        key = (dataclasses.astuple(params), sample_rate, num_channels)
+        if key not in self._keys:
+            self._keys[key] = _PoolKey(
+                dataclasses.replace(params), sample_rate, num_channels
+            )
+            self._idle[key] = collections.deque()
+            self._warming[key] = 0
+        return key
+
+    def _refill(self, key: tuple):
+        while len(self._idle[key]) + self._warming[key] < self._size:
+            self._warming[key] += 1
+            task = asyncio.create_task(self._warm(key))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _warm(self, key: tuple):
+        pool_key = self._keys[key]
+        source = audio_base.NullAudioSource(pool_key.sample_rate, pool_key.num_channels)
+        session = self._session_factory(
+            source, audio_base.NullAudioSink(), pool_key.params
+        )
+        warm = _WarmSession(session, asyncio.get_running_loop().time())
+        session.on("error", warm.on_error)
+        try:
+            await session.warmup()
+            await asyncio.wait_for(session.wait_connected(), WARMUP_TIMEOUT)
+        except asyncio.CancelledError:
+            await self._discard(warm)
+            raise
+        except Exception as e:
+            logging.warning(f"[pool] failed to warm up session: {e}")
+            self._stats.failed += 1
+            await self._discard(warm)
+            return
+        finally:
+            self._warming[key] -= 1
+        warm.created_at = asyncio.get_running_loop().time()
+        self._idle[key].append(warm)
+
+    def _expire(self, key: tuple):
+        now = asyncio.get_running_loop().time()
+        idle = self._idle[key]
+        for warm in list(idle):
+            if warm.failed or now - warm.created_at > self._max_idle_age:
+                idle.remove(warm)
+                self._stats.expired += 1
+                task = asyncio.create_task(self._discard(warm))
+                self._tasks.add(task)
+                task.add_done_callback(self._tasks.discard)
+
+    async def _discard(self, warm: _WarmSession):
+        try:
+            await warm.session.stop()
+        except Exception as e:
+            logging.warning(f"[pool] error stopping session: {e}")
+
+    async def _reap_loop(self):
+        while True:
+            await asyncio.sleep(max(self._max_idle_age / 4, 1.0))
+            for key in self._keys:
+                self._expire(key)
+                self._refill(key)
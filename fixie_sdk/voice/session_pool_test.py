@@ -0,0 +1,101 @@
+import asyncio
+
+import pytest
+from pyee import asyncio as pyee_asyncio
+
+from fixie_sdk.voice import audio_base
+from fixie_sdk.voice import session_pool
+from fixie_sdk.voice.session import VoiceSessionParams
+
+
+class FakeSession(pyee_asyncio.AsyncIOEventEmitter):
+    instances: list["FakeSession"] = []
+
+    def __init__(self, source, sink, params):
+        super().__init__()
+        self.source = source
+        self.sink = sink
+        self.params = params
+        self.stopped = False
+        FakeSession.instances.append(self)
+
+    async def warmup(self):
+        await asyncio.sleep(0)
+
+    async def wait_connected(self):
+        await asyncio.sleep(0)
+
+    async def attach(self, source, sink):
+        self.source = source
+        self.sink = sink
+
+    async def stop(self):
+        self.stopped = True
+
+
+@pytest.fixture
+def pool():
+    FakeSession.instances = []
+    return session_pool.VoiceSessionPool(
+        size=1, max_idle_age=10, session_factory=FakeSession
+    )
+
+
+@pytest.mark.asyncio
+async def test_miss_then_hit(pool):
+    params = VoiceSessionParams(agent_id="a")
+    source = audio_base.NullAudioSource(8000)
+    sink = audio_base.NullAudioSink()
+
+    session = await pool.acquire(source, sink, params)
+    assert session.source is source
+    assert pool.stats.misses == 1
+
+    await asyncio.sleep(0.01)
+    assert pool.stats.idle == 1
+    warm = await pool.acquire(source, sink, params)
+    assert warm is not session
+    assert warm.source is source
+    assert warm.sink is sink
+    assert pool.stats.hits == 1
+    await pool.close()
+
+
+@pytest.mark.asyncio
+async def test_prewarm_is_per_params_and_format(pool):
+    params = VoiceSessionParams(agent_id="a")
+    pool.prewarm(params, sample_rate=8000)
+    await asyncio.sleep(0.01)
+    assert pool.stats.idle == 1
+    await pool.acquire(
+        audio_base.NullAudioSource(48000), audio_base.NullAudioSink(), params
+    )
+    await pool.acquire(
+        audio_base.NullAudioSource(8000),
+        audio_base.NullAudioSink(),
+        VoiceSessionParams(agent_id="b"),
+    )
+    stats = pool.stats
+    assert stats.hits == 0
+    assert stats.misses == 2
+    await pool.close()
+
+
+@pytest.mark.asyncio
+async def test_expired_and_failed_sessions_are_replaced(pool):
+    params = VoiceSessionParams()
+    pool.prewarm(params)
+    await asyncio.sleep(0.01)
+    FakeSession.instances[0].emit("error", Exception("gone"))
+    session = await pool.acquire(
+        audio_base.NullAudioSource(), audio_base.NullAudioSink(), params
+    )
+    assert session is not FakeSession.instances[0]
+    await asyncio.sleep(0.01)
+    assert FakeSession.instances[0].stopped
+    stats = pool.stats
+    assert stats.expired == 1
+    assert stats.misses == 1
+    assert stats.idle == 1
+    await pool.close()
+    assert all(session.stopped for session in FakeSession.instances[2:])
@@ -0,0 +1,58 @@
+import pytest
+
+from fixie_sdk.voice import audio_base
+from fixie_sdk.voice import types
+from fixie_sdk.voice.session import OutputBuilder
+from fixie_sdk.voice.session import VoiceSession
+from fixie_sdk.voice.session import VoiceSessionParams
+
+
+def test_output_builder():
+    builder = OutputBuilder()
+    assert builder.text == ""
+    assert builder.append("Hello") == 0
+    assert builder.append(", ") == 5
+    assert builder.append("world") == 7
+    assert len(builder) == 12
+    assert builder.text == "Hello, world"
+    assert builder.append("!") == 12
+    assert builder.text == "Hello, world!"
+    builder.clear()
+    assert builder.text == ""
+    assert builder.append("Hi") == 0
+
+
+def _receive(session: VoiceSession, msg: types.Message):
+    session._on_data_received(types.message_to_json(msg).encode(), None, None, "")
+
+
+@pytest.mark.asyncio
+async def test_output_delta_events():
+    params = VoiceSessionParams(output_deltas=True)
+    session = VoiceSession(
+        audio_base.NullAudioSource(), audio_base.NullAudioSink(), params
+    )
+    deltas = []
+    outputs = []
+    session.on("output_delta", lambda delta, offset: deltas.append((delta, offset)))
+    session.on("output", lambda text, final: outputs.append((text, final)))
+    _receive(session, types.OutputDeltaMessage(delta="Hello"))
+    _receive(session, types.OutputDeltaMessage(delta=" there"))
+    assert deltas == [("Hello", 0), (" there", 5)]
+    assert session.pending_output == "Hello there"
+    assert outputs == []
+    _receive(session, types.OutputCompleteMessage(text="Hello there."))
+    assert outputs == [("Hello there.", True)]
+    assert session.pending_output == ""
+
+
+@pytest.mark.asyncio
+async def test_partial_output_events():
+    session = VoiceSession(
+        audio_base.NullAudioSource(), audio_base.NullAudioSink(), VoiceSessionParams()
+    )
+    outputs = []
+    session.on("output", lambda text, final: outputs.append((text, final)))
+    _receive(session, types.OutputDeltaMessage(delta="Hello"))
+    _receive(session, types.OutputDeltaMessage(delta=" there"))
+    assert outputs == [("Hello", False), ("Hello there", False)]
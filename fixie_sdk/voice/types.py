@@ -1,8 +1,5 @@
 import enum
-import inspect
-import json
 import logging
-import sys
 from dataclasses import dataclass
 from typing import Literal, Optional
 
@@ -10,6 +7,8 @@ from dataclasses_json import DataClassJsonMixin
 from dataclasses_json import LetterCase
 from dataclasses_json import config
 
+from fixie_sdk.voice import json_codec
+
 
 class SessionState(enum.StrEnum):
     IDLE = "idle"
@@ -23,6 +22,9 @@ class SessionMetric(enum.StrEnum):
     LLM_FIRST_TOKEN = "llm"
     LLM_FIRST_UTTERANCE = "llmt"
     TTS = "tts"
+    # Measured on the client: from the end of the user's speech in the source
+    # to the first audible output written to the sink.
+    END_TO_END = "e2e"
 
 
 class SessionError(enum.StrEnum):
@@ -36,10 +38,25 @@ class Parameters(DataClassJsonMixin):
 
 
 class Message(DataClassJsonMixin):
-    """Base class for client-server messages."""
+    """Base class for client-server messages.
+
+    Subclasses are registered by their `type` value when they are defined, so
+    looking up the class for an incoming message is a single dict access. Use
+    message_from_json and message_to_json on hot paths; they go through codecs
+    compiled once per class rather than the DataClassJsonMixin reflection.
+    """
 
     dataclass_json_config = config(letter_case=LetterCase.CAMEL)["dataclasses_json"]
 
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        message_type = cls.__dict__.get("type")
+        if isinstance(message_type, str):
+            _MESSAGE_CLASSES[message_type] = cls
+
+
+_MESSAGE_CLASSES: dict[str, type[Message]] = {}
+
 
 @dataclass
 class ASRParameters(Parameters):
@@ -170,19 +187,24 @@ class TranscriptMessage(Message):
     transcript: Transcript
 
 
-def message_from_json(data: str):
-    """Deserialize a JSON message into a Message object."""
-    msg = json.loads(data)
+def message_from_json(data: str | bytes):
+    """Deserialize a JSON message into a Message object.
+
+    Returns None if the message type is unknown.
+    """
+    msg = json_codec.loads(data)
     type = msg["type"]
     clazz = get_message_class(type)
     if clazz is None:
         logging.warning(f"Unknown message type {type}")
-    return clazz.from_dict(msg)
+        return None
+    return json_codec.get_decoder(clazz)(msg)
+
+
+def message_to_json(msg: Message) -> str:
+    """Serialize a Message object into JSON."""
+    return json_codec.dumps(json_codec.get_encoder(type(msg))(msg))
 
 
-def get_message_class(type: str):
-    for _, obj in inspect.getmembers(sys.modules[__name__]):
-        if inspect.isclass(obj) and issubclass(obj, Message):
-            if type == getattr(obj, "type", None):
-                return obj
-    return None
+def get_message_class(type: str) -> Optional[type[Message]]:
+    return _MESSAGE_CLASSES.get(type)
@@ -1,3 +1,5 @@
+import json
+
 from fixie_sdk.voice import types
 
 
@@ -37,3 +39,80 @@ def test_init_message():
     assert message.params.tts.voice == "test_tts_voice"
     assert message.params.agent.model == "test_agent_model"
     assert message.params.agent.agent_id == "test_agent_id"
+
+
+def test_message_registry():
+    assert types.get_message_class("init") is types.InitMessage
+    assert types.get_message_class("room_info") is types.RoomInfoMessage
+    assert types.get_message_class("transcript") is types.TranscriptMessage
+    assert types.get_message_class("bogus") is None
+
+
+def test_message_from_json_unknown_type():
+    assert types.message_from_json('{"type": "bogus"}') is None
+
+
+def test_message_from_json_fast_paths():
+    messages = [
+        types.OutputDeltaMessage(delta="Hello"),
+        types.TranscriptMessage(
+            transcript=types.Transcript(
+                text="Hi there", final=True, stream_timestamp=10
+            )
+        ),
+        types.PongMessage(timestamp=1234.5),
+        types.StateMessage(state=types.SessionState.SPEAKING),
+    ]
+    for message in messages:
+        data = message.to_json()
+        decoded = types.message_from_json(data)
+        assert decoded == message
+        assert decoded == type(message).from_json(data)
+
+
+def _all_messages():
+    return [
+        types.InitMessage(
+            params=types.InitParameters(
+                asr=types.ASRParameters(provider="asr", base_url="https://x"),
+                tts=types.TTSParameters(provider="tts", rate=1.2),
+                agent=types.AgentParameters(agent_id="agent", conversation_id="c"),
+            )
+        ),
+        types.RoomInfoMessage(
+            room_url="wss://room", token="token", feature_flags={"a": True, "b": 2}
+        ),
+        types.InterruptMessage(),
+        types.LatencyMessage(kind=types.SessionMetric.TTS, value=42),
+        types.OutputDeltaMessage(delta="Hello"),
+        types.OutputCompleteMessage(text="Hello world"),
+        types.PingMessage(timestamp=1.5),
+        types.PongMessage(timestamp=1.5),
+        types.StateMessage(state=types.SessionState.THINKING),
+        types.ConversationCreatedMessage(conversation_id="conv"),
+        types.ErrorMessage(error=types.SessionError.TTS_ERROR, message="oops"),
+        types.TranscriptMessage(
+            transcript=types.Transcript(text="hi", final=False, last_voice_timestamp=3)
+        ),
+    ]
+
+
+def test_message_to_json_matches_mixin():
+    for message in _all_messages():
+        assert json.loads(types.message_to_json(message)) == message.to_dict(
+            encode_json=True
+        )
+
+
+def test_message_from_json_matches_mixin():
+    for message in _all_messages():
+        data = message.to_json()
+        assert types.message_from_json(data) == type(message).from_json(data)
+        assert types.message_from_json(data.encode()) == message
+
+
+def test_message_from_json_defaults():
+    message = types.message_from_json('{"type": "init", "params": {"tts": {}}}')
+    assert message == types.InitMessage(
+        params=types.InitParameters(tts=types.TTSParameters())
+    )